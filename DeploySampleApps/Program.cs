@@ -551,7 +551,8 @@ class Program
             SiteConfig = new SiteConfigProperties()
             {
                 LinuxFxVersion = "PYTHON|3.11",
-                AppSettings = CreateWebAppSettings()
+                AppSettings = CreateWebAppSettings(),
+                HealthCheckPath = "/healthz"
             },
             IsHttpsOnly = true
         };
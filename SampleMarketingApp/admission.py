@@ -0,0 +1,217 @@
+"""
+Admission control and load shedding for expensive routes
+
+Each limited endpoint gets a concurrency limit with a small bounded wait
+queue and, optionally, a token-bucket rate limit. Requests over the limits
+are rejected straight away with 503 and a Retry-After header instead of
+tying up a worker, so cheap catalog routes keep their latency under
+overload. Limits are per worker process.
+
+A queued request waits on a worker thread just like a running one, so
+limited routes may together hold at most GUNICORN_THREADS - 1 threads,
+running or queued, and at least one thread is always left for the cheap
+routes. Per-route defaults are derived from that budget, and overrides
+whose concurrency plus queue exceed it are clamped.
+
+Limits are keyed by endpoint name and can be overridden with the
+ADMISSION_LIMITS environment variable (JSON), for example:
+
+    ADMISSION_LIMITS='{"products": {"concurrency": 2, "queue": 1, "rate": 20, "burst": 40}}'
+
+Set ADMISSION_CONTROL=0 to disable admission control entirely.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+
+def thread_budget(threads):
+    """Worker threads one route may hold (running plus queued) out of threads"""
+    return max(1, threads - 1)
+
+
+def default_limits(threads):
+    """Per-endpoint limits for workers with the given number of threads
+
+    endpoint -> limits; concurrency/queue are request counts, queue_timeout
+    and retry_after are seconds, rate is requests per second with a burst
+    allowance.
+    """
+    budget = thread_budget(threads)
+    queue = min(2, budget // 2)
+    return {
+        'faults.high_cpu_fault': {"concurrency": 1, "queue": 0},
+        'faults.high_memory_fault': {"concurrency": 1, "queue": 0},
+        'faults.slow_call_fault': {"concurrency": budget - queue, "queue": queue, "queue_timeout": 5},
+        'products': {"concurrency": budget - queue, "queue": queue, "queue_timeout": 2},
+    }
+
+
+def _clamp(endpoint, settings, budget):
+    """Keep a route's concurrency plus queue within the thread budget"""
+    concurrency = settings.get('concurrency')
+    queue = settings.get('queue', 0)
+    if concurrency and concurrency + queue > budget:
+        clamped_concurrency = min(concurrency, budget)
+        clamped_queue = budget - clamped_concurrency
+        logger.warning("Admission limits for %s (concurrency %s, queue %s) exceed the %s worker threads "
+                       "one route may hold; using concurrency %s, queue %s",
+                       endpoint, concurrency, queue, budget, clamped_concurrency, clamped_queue)
+        settings = {**settings, "concurrency": clamped_concurrency, "queue": clamped_queue}
+    return settings
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at rate tokens per second"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token; return 0 on success or the seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class RouteLimiter:
+    """Concurrency limit with a bounded wait queue and an optional rate limit"""
+
+    def __init__(self, concurrency=None, queue=0, queue_timeout=1.0, rate=None, burst=None, retry_after=1):
+        # No concurrency limit means only the rate limit applies
+        self.concurrency = concurrency or math.inf
+        self.max_queue = queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.bucket = TokenBucket(rate, burst or max(1, math.ceil(rate))) if rate else None
+
+        self.in_flight = 0
+        self.queued = 0
+        self._cond = threading.Condition()
+        self.stats = {"admitted": 0, "queued_total": 0, "shed_rate": 0, "shed_concurrency": 0, "shed_queue_timeout": 0}
+
+    def acquire(self):
+        """Admit a request; return None on success or a Retry-After value in seconds"""
+        if self.bucket is not None:
+            wait = self.bucket.try_acquire()
+            if wait:
+                with self._cond:
+                    self.stats["shed_rate"] += 1
+                return max(1, math.ceil(wait))
+
+        with self._cond:
+            if self.in_flight < self.concurrency:
+                self.in_flight += 1
+                self.stats["admitted"] += 1
+                return None
+            if self.queued >= self.max_queue:
+                self.stats["shed_concurrency"] += 1
+                return self.retry_after
+
+            self.queued += 1
+            self.stats["queued_total"] += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.in_flight < self.concurrency, self.queue_timeout)
+            finally:
+                self.queued -= 1
+            if not admitted:
+                self.stats["shed_queue_timeout"] += 1
+                return self.retry_after
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return None
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def info(self):
+        with self._cond:
+            return {
+                "concurrency_limit": self.concurrency if self.concurrency != math.inf else None,
+                "queue_limit": self.max_queue,
+                "rate_limit": self.bucket.rate if self.bucket is not None else None,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                **self.stats
+            }
+
+
+def _admit():
+    limiter = current_app.extensions['admission'].get(request.endpoint)
+    if limiter is None:
+        return None
+    # The shared budget counts queued requests too, since they hold a thread
+    budget = current_app.extensions['admission_budget']
+    retry_after = budget.acquire()
+    if retry_after is None:
+        retry_after = limiter.acquire()
+        if retry_after is not None:
+            budget.release()
+    if retry_after is not None:
+        response = jsonify({
+            "error": "Service overloaded",
+            "details": f"Too many concurrent requests to {request.path}, retry later",
+            "retry_after_seconds": retry_after
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    g.admission_limiter = limiter
+    return None
+
+
+def _release(exc=None):
+    limiter = g.pop('admission_limiter', None)
+    if limiter is not None:
+        limiter.release()
+        current_app.extensions['admission_budget'].release()
+
+
+def admission_stats():
+    """API endpoint reporting admission counters per limited route"""
+    limiters = current_app.extensions.get('admission', {})
+    stats = {endpoint: limiter.info() for endpoint, limiter in limiters.items()}
+    if 'admission_budget' in current_app.extensions:
+        stats["(all limited routes)"] = current_app.extensions['admission_budget'].info()
+    return jsonify(stats)
+
+
+def init_admission(app):
+    """Attach route limiters from default_limits() and ADMISSION_LIMITS to an app"""
+    if os.getenv('ADMISSION_CONTROL', '1') == '0':
+        return
+
+    # The same setting gunicorn.conf.py sizes each worker's thread pool with
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+    limits = default_limits(threads)
+    for endpoint, settings in json.loads(os.getenv('ADMISSION_LIMITS', '{}') or '{}').items():
+        limits.setdefault(endpoint, {}).update(settings)
+
+    budget = thread_budget(threads)
+    app.extensions['admission'] = {
+        endpoint: RouteLimiter(**_clamp(endpoint, settings, budget)) for endpoint, settings in limits.items()
+        if settings.get('concurrency') or settings.get('rate')
+    }
+    app.extensions['admission_budget'] = RouteLimiter(concurrency=budget, queue=0)
+    app.before_request(_admit)
+    app.teardown_request(_release)
+    app.add_url_rule('/api/diagnostics/admission', 'admission_stats', admission_stats)
@@ -2,75 +2,30 @@
 SQLite setup for development/testing without PostgreSQL
 """
 
-from flask import Flask, render_template, jsonify
-from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
+import logging
 import os
 
+from factory import create_app
+from models import db, Item, create_catalog_meta, create_indexes
+
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-
 # Use SQLite for development if PostgreSQL is not available
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///marketing_app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-
-db = SQLAlchemy(app)
-
-# Database Models
-class Item(db.Model):
-    __tablename__ = 'items'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text)
-    price = db.Column(db.Numeric(10, 2), nullable=False)
-    category = db.Column(db.String(50))
-    image_url = db.Column(db.String(255))
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'price': float(self.price),
-            'category': self.category,
-            'image_url': self.image_url
-        }
-
-# Routes
-@app.route('/')
-def home():
-    """Marketing landing page"""
-    # Get featured items from database
-    featured_items = Item.query.limit(6).all()
-    return render_template('index.html', featured_items=featured_items)
-
-@app.route('/api/items')
-def get_items():
-    """API endpoint to get all items"""
-    items = Item.query.all()
-    return jsonify([item.to_dict() for item in items])
-
-@app.route('/api/items/<int:item_id>')
-def get_item(item_id):
-    """API endpoint to get a specific item"""
-    item = Item.query.get_or_404(item_id)
-    return jsonify(item.to_dict())
-
-@app.route('/products')
-def products():
-    """Products page showing all items"""
-    items = Item.query.all()
-    return render_template('products.html', items=items)
+app = create_app(backend='sqlite', config={
+    'SECRET_KEY': os.getenv('SECRET_KEY', 'dev-secret-key'),
+    'PRODUCTS_ENABLED': True
+}, faults=False)
+logger = logging.getLogger(__name__)
 
 # Create tables
 def create_tables():
     """Create database tables"""
     with app.app_context():
         db.create_all()
+        create_indexes(db.engine)
+        create_catalog_meta(db.engine)
         
         # Add sample data if no items exist
         if Item.query.count() == 0:
@@ -93,7 +48,7 @@ def create_tables():
                 db.session.add(item)
             
             db.session.commit()
-            print("Sample data added to database")
+            logger.info("Sample data added to database")
 
 if __name__ == '__main__':
     create_tables()
@@ -0,0 +1,92 @@
+"""
+Add-to-cart throughput benchmark: write-behind vs write-through
+
+Drives POST /api/cart/items from concurrent sessions (one Flask test
+client and cookie jar per thread) against a throwaway SQLite database.
+It runs once with CART_FLUSH_INTERVAL=0 (a database write per click) and
+once with write-behind batching.
+
+Usage:
+    python benchmarks/bench_cart.py [--sessions 16] [--adds 200] [--flush-interval 1]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+
+def run(flush_interval, sessions, adds, db_path):
+    os.environ['CART_FLUSH_INTERVAL'] = str(flush_interval)
+
+    from factory import create_app
+    from models import db, Item
+
+    app = create_app(backend='sqlite', config={
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+        'SECRET_KEY': 'benchmark'
+    }, faults=False)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all(Item(name=f"Item {i}", price=9.99, category="Bench") for i in range(1, 51))
+        db.session.commit()
+
+    store = app.extensions['cart_store']
+    errors = [0]
+    lock = threading.Lock()
+
+    def session_worker(worker_id):
+        client = app.test_client()
+        failed = 0
+        for i in range(adds):
+            response = client.post('/api/cart/items', json={"product_id": (worker_id + i) % 50 + 1})
+            if response.status_code != 201:
+                failed += 1
+        with lock:
+            errors[0] += failed
+
+    threads = [threading.Thread(target=session_worker, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    store.flush()
+    return {
+        "adds_per_second": sessions * adds / elapsed,
+        "errors": errors[0],
+        **store.info()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--adds', type=int, default=200, help="add-to-cart calls per session")
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        results = {
+            "write-through": run(0, args.sessions, args.adds, db_path),
+            f"write-behind {args.flush_interval}s": run(args.flush_interval, args.sessions, args.adds, db_path)
+        }
+
+    print(f"\n{args.sessions} sessions x {args.adds} adds")
+    print(f"{'mode':<20}{'adds/s':>10}{'flushes':>10}{'carts written':>15}{'errors':>8}")
+    for name, stats in results.items():
+        print(f"{name:<20}{stats['adds_per_second']:>10.1f}{stats['flushes']:>10}"
+              f"{stats['carts_written']:>15}{stats['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
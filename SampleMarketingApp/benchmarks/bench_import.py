@@ -0,0 +1,90 @@
+"""
+Startup import-cost benchmark
+
+Runs each scenario in a fresh interpreter with `python -X importtime` and
+reports the total import time, module count and wall time (median of
+several runs). "eager faults" imports faults.py up front the way app.py
+did before the fault routes became a lazily imported blueprint, and
+"app" is what setup_db.py used to pay by importing the web app (including
+its 5 second startup wait).
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "lazy faults": "from factory import create_app; create_app(backend='sqlite')",
+    "eager faults": "from factory import create_app; create_app(backend='sqlite'); import faults",
+    "setup_db": "import setup_db",
+    "app": "import app",
+}
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(statement, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=APP_DIR, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    return wall, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="show the N slowest top-level imports per scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            'SQLITE_DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'SECRET_KEY': 'benchmark'
+        })
+
+        summary = {}
+        for name, statement in SCENARIOS.items():
+            measure(statement, env)  # Warm up the bytecode and file caches
+            runs = [measure(statement, env) for _ in range(args.runs)]
+            walls = [wall for wall, _ in runs]
+            modules = runs[len(runs) // 2][1]
+            totals = [sum(self_us for self_us, _ in run.values()) for _, run in runs]
+            summary[name] = (statistics.median(totals) / 1000, len(modules), statistics.median(walls) * 1000)
+
+            print(f"\n{name}: {statement}")
+            slowest = sorted(modules.items(), key=lambda m: m[1][1], reverse=True)
+            # Only show top-level packages so nested imports are not double counted
+            shown = [(mod, times) for mod, times in slowest if '.' not in mod][:args.top]
+            for mod, (_, cumulative_us) in shown:
+                print(f"  {cumulative_us / 1000:>8.1f} ms  {mod}")
+
+    print(f"\n{'scenario':<14}{'import ms':>12}{'modules':>10}{'wall ms':>10}")
+    for name, (import_ms, count, wall_ms) in summary.items():
+        print(f"{name:<14}{import_ms:>12.1f}{count:>10}{wall_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Request latency benchmark with heavy logging: off vs synchronous vs queued
+
+Serves a route that logs --messages records per request (the way the SNAT
+fault used to print twice per outbound call) and measures request latency
+from concurrent clients in three modes:
+
+    off     logging below the configured level
+    sync    a StreamHandler writing JSON lines directly from the request thread
+    queued  logging_config's bounded queue and background writer
+
+--sink-delay-ms simulates a slow log sink (e.g. a backed-up container pipe).
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 500] [--messages 50] [--sink-delay-ms 0]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from flask import Flask  # noqa: E402
+
+from logging_config import DroppingQueueHandler, JsonFormatter  # noqa: E402
+
+
+class SlowStream:
+    """File wrapper that sleeps on every write to mimic a slow sink"""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def build_app(messages):
+    app = Flask(__name__)
+    logger = logging.getLogger('bench')
+
+    @app.route('/work')
+    def work():
+        for i in range(messages):
+            logger.info("Request %d/%d to www.bing.com...", i + 1, messages)
+        return "ok"
+
+    return app, logger
+
+
+def measure(app, requests_total, clients):
+    latencies = []
+    lock = threading.Lock()
+    per_client = requests_total // clients
+
+    def client():
+        test_client = app.test_client()
+        local = []
+        for _ in range(per_client):
+            start = time.perf_counter()
+            test_client.get('/work')
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+
+    def pick(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return pick(50), pick(99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--messages', type=int, default=50, help="log records per request")
+    parser.add_argument('--sink-delay-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    app, logger = build_app(args.messages)
+    logger.propagate = False
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = SlowStream(open(os.path.join(tmp, 'bench.log'), 'w'), args.sink_delay_ms / 1000)
+
+        logger.setLevel(logging.WARNING)
+        results["off"] = measure(app, args.requests, args.clients)
+        logger.setLevel(logging.INFO)
+
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        results["sync"] = measure(app, args.requests, args.clients)
+        logger.removeHandler(handler)
+
+        queued = DroppingQueueHandler(handler, maxsize=10000)
+        logger.addHandler(queued)
+        results["queued"] = measure(app, args.requests, args.clients)
+        logger.removeHandler(queued)
+        queued.stop()
+        sink.stream.close()
+
+    print(f"\n{args.requests} requests, {args.clients} clients, {args.messages} log records/request, "
+          f"sink delay {args.sink_delay_ms}ms")
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, (p50, p99) in results.items():
+        print(f"{name:<10}{p50:>10.2f}{p99:>10.2f}")
+    print(f"queued mode dropped {queued.dropped} records")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Throughput benchmark: Flask development server vs gunicorn
+
+Starts each server against a throwaway SQLite database, drives it with a
+pool of client threads for a fixed time and prints requests/s and latency
+percentiles for each.
+
+Usage:
+    python benchmarks/bench_server.py [--path /api/items] [--clients 16] [--seconds 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEV_SERVER = (
+    "from app import app, create_tables; create_tables(); "
+    "app.run(host='127.0.0.1', port={port}, threaded=True)"
+)
+
+
+def wait_until_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become ready in {timeout} seconds")
+
+
+def drive(url, clients, seconds):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+
+    def client():
+        session = requests.Session()
+        local = []
+        failed = 0
+        while time.time() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                if response.status_code >= 400:
+                    failed += 1
+            except requests.exceptions.RequestException:
+                failed += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+
+    def pick(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / seconds,
+        "p50_ms": pick(50) if latencies else 0.0,
+        "p99_ms": pick(99) if latencies else 0.0
+    }
+
+
+def run_server(name, command, env, port, args):
+    print(f"Starting {name}...")
+    process = subprocess.Popen(command, cwd=APP_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        wait_until_ready(base + args.path)
+        drive(base + args.path, args.clients, 1)  # Warm up
+        return drive(base + args.path, args.clients, args.seconds)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/items')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'SECRET_KEY': 'benchmark',
+            'PORT': str(args.port),
+            'GUNICORN_ACCESSLOG': '/dev/null'
+        })
+
+        results = {
+            "dev server": run_server(
+                "dev server", [sys.executable, '-c', DEV_SERVER.format(port=args.port)], env, args.port, args),
+            "gunicorn": run_server(
+                "gunicorn", [sys.executable, '-m', 'gunicorn', 'wsgi:application'], env, args.port, args)
+        }
+
+    print(f"\n{args.clients} clients, {args.seconds}s, GET {args.path}")
+    print(f"{'server':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, stats in results.items():
+        print(f"{name:<12}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+SQLite read throughput across worker processes: default vs tuned vs snapshot
+
+Generates a synthetic catalog into a throwaway SQLite file, then forks
+--workers processes that each build the app and look up random batches of
+items through /api/items?ids=... for a fixed time. It runs three modes:
+
+    default   stock pragmas (rollback journal, small page cache)
+    tuned     SQLITE_TUNED=1: WAL, mmap, large cache, read-only connections
+    snapshot  SQLITE_TUNED=1 SQLITE_SNAPSHOT=1: in-memory copy per worker
+
+--writer adds a process committing a cart write every 10ms during each run,
+which is where the rollback journal makes readers wait.
+
+Usage:
+    python benchmarks/bench_sqlite.py [--rows 200000] [--workers 4] [--threads 4] [--seconds 10] [--writer]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from generate_catalog import CatalogGenerator, write_sqlite  # noqa: E402
+
+MODES = {
+    "default": {"SQLITE_TUNED": "0", "SQLITE_SNAPSHOT": "0"},
+    "tuned": {"SQLITE_TUNED": "1", "SQLITE_SNAPSHOT": "0"},
+    "snapshot": {"SQLITE_TUNED": "1", "SQLITE_SNAPSHOT": "1"},
+}
+
+
+def build_app(db_path):
+    from factory import create_app
+    return create_app(backend='sqlite', config={
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+        'SECRET_KEY': 'benchmark'
+    }, faults=False)
+
+
+def reader(db_path, rows, threads, batch, seconds, results):
+    app = build_app(db_path)
+    counts = []
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        test_client = app.test_client()
+        done = failed = 0
+        while time.time() < deadline:
+            ids = ",".join(str(rng.randint(1, rows)) for _ in range(batch))
+            if test_client.get(f'/api/items?ids={ids}').status_code != 200:
+                failed += 1
+            done += 1
+        with lock:
+            counts.append((done, failed))
+
+    workers = [threading.Thread(target=client, args=(os.getpid() * 100 + i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((sum(done for done, _ in counts), sum(failed for _, failed in counts)))
+
+
+def writer(db_path, stop):
+    app = build_app(db_path)
+    from models import db, CartItem
+    i = 0
+    with app.app_context():
+        while not stop.is_set():
+            i += 1
+            db.session.merge(CartItem(cart_id="bench-writer", item_id=i % 100 + 1, quantity=i))
+            db.session.commit()
+            time.sleep(0.01)
+
+
+def run(mode, db_path, args):
+    os.environ.update(MODES[mode])
+    if mode == "default":
+        # WAL is persistent, so switch an earlier tuned run's file back
+        connection = sqlite3.connect(db_path)
+        connection.execute("PRAGMA journal_mode = DELETE")
+        connection.close()
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    stop = context.Event()
+    writer_process = context.Process(target=writer, args=(db_path, stop)) if args.writer else None
+    if writer_process is not None:
+        writer_process.start()
+    processes = [context.Process(target=reader, args=(db_path, args.rows, args.threads, args.batch,
+                                                      args.seconds, results))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    if writer_process is not None:
+        stop.set()
+        writer_process.join()
+
+    requests_done = sum(done for done, _ in totals)
+    return {
+        "requests_per_second": requests_done / args.seconds,
+        "items_per_second": requests_done * args.batch / args.seconds,
+        "errors": sum(failed for _, failed in totals)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=4, help="reader processes")
+    parser.add_argument('--threads', type=int, default=4, help="client threads per process")
+    parser.add_argument('--batch', type=int, default=50, help="item ids per request")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writer', action='store_true', help="commit cart writes during the run")
+    parser.add_argument('--modes', default=",".join(MODES))
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        write_sqlite(db_path, CatalogGenerator().rows(args.rows), 10000, truncate=True)
+        with build_app(db_path).app_context():
+            from models import db
+            db.create_all()
+        for mode in args.modes.split(","):
+            results[mode] = run(mode, db_path, args)
+
+    print(f"\n{args.rows} items, {args.workers} processes x {args.threads} threads, "
+          f"{args.batch} ids/request{', with writer' if args.writer else ''}")
+    print(f"{'mode':<10}{'requests/s':>12}{'items/s':>12}{'errors':>8}")
+    for mode, stats in results.items():
+        print(f"{mode:<10}{stats['requests_per_second']:>12.1f}{stats['items_per_second']:>12.0f}{stats['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
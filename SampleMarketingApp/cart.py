@@ -0,0 +1,368 @@
+"""
+Server-side shopping cart with write-behind persistence
+
+Carts live in an in-memory store keyed by a per-session cart id. Mutations
+only touch memory and are recorded as per-line changes (add n, or set to
+n, where 0 removes the line); a background thread writes them to the
+cart_items table in batches every CART_FLUSH_INTERVAL seconds (0 writes
+through on every change). Adds become an increment of the stored
+quantity, sets an upsert and removals a delete of that one line, so
+workers writing to the same cart never overwrite each other's lines.
+
+Each worker process has its own store. A cart's stored rows are re-read
+once the resident copy is older than CART_REFRESH_SECONDS (default 2) and
+this worker's unwritten changes are applied on top, so a change made on
+another worker is seen here at most CART_FLUSH_INTERVAL plus
+CART_REFRESH_SECONDS later. Memory is bounded by evicting carts that have
+been idle for CART_IDLE_SECONDS, and the least recently used ones once
+more than CART_MAX_CARTS are held.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import Blueprint, current_app, jsonify, request, session
+from sqlalchemy import bindparam, case, delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, CartItem, Item, MAX_ID, is_valid_id
+from per_process import PerProcess, start_daemon
+
+logger = logging.getLogger(__name__)
+
+MAX_QUANTITY = 99
+
+
+def _apply(cart, changes):
+    """Apply {item_id: ('add' | 'set', n)} changes to a cart dict in place"""
+    for item_id, (operation, n) in changes.items():
+        quantity = cart.get(item_id, 0) + n if operation == 'add' else n
+        quantity = max(0, min(MAX_QUANTITY, quantity))
+        if quantity:
+            cart[item_id] = quantity
+        else:
+            cart.pop(item_id, None)
+    return cart
+
+
+def _combine(changes, item_id, change):
+    """Fold a later change to one line into changes; a set replaces, an add accumulates"""
+    operation, n = change
+    if operation == 'add' and item_id in changes:
+        earlier, m = changes[item_id]
+        change = (earlier, min(MAX_QUANTITY, m + n))
+    changes[item_id] = change
+
+
+class CartStore:
+    """In-memory LRU cart store that writes per-line changes behind in batches"""
+
+    def __init__(self, app, max_carts=10000, idle_seconds=1800, flush_interval=2.0, flush_batch_size=500,
+                 refresh_seconds=2.0):
+        self.app = app
+        self.max_carts = max_carts
+        self.idle_seconds = idle_seconds
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.refresh_seconds = refresh_seconds
+
+        self._carts = OrderedDict()  # cart_id -> {item_id: quantity} as last read, least recently used first
+        self._loaded = {}            # cart_id -> monotonic time the rows were read
+        self._last_access = {}       # cart_id -> monotonic time of last use
+        self._dirty = {}             # cart_id -> {item_id: change} not yet written
+        self._flushing = {}          # cart_id -> {item_id: change} being written by flush()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = PerProcess(lambda: start_daemon(self._run, 'cart-write-behind'))
+        self.stats = {"mutations": 0, "flushes": 0, "carts_written": 0, "lines_written": 0,
+                      "loads": 0, "evictions": 0}
+
+    def start(self):
+        """Start the write-behind thread if it is not running in this process"""
+        if self.flush_interval > 0:
+            self._thread()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Cart write-behind flush failed: %s", e)
+
+    def create(self, cart_id):
+        """Register a brand new, empty cart without a database read"""
+        with self._lock:
+            self._touch(cart_id, {}, loaded=True)
+
+    def get(self, cart_id):
+        """Return a copy of a cart, re-reading its rows if they are missing or stale"""
+        with self._lock:
+            cart = self._view(cart_id)
+            if cart is not None:
+                return cart
+        # With no flush in flight the rows hold every earlier flush and none
+        # of the changes still pending here, which _view applies on top
+        with self._flush_lock:
+            with self._lock:
+                cart = self._view(cart_id)
+                if cart is not None:
+                    return cart
+            rows = self._load(cart_id)
+            with self._lock:
+                self._touch(cart_id, rows, loaded=True)
+                return self._view(cart_id, fresh=False)
+
+    def set_quantity(self, cart_id, item_id, quantity=None, delta=0):
+        """Set an item's quantity (0 removes it) or add a positive delta to it"""
+        before = self.get(cart_id)
+        if quantity is None:
+            change = ('add', min(MAX_QUANTITY, delta))
+        else:
+            change = ('set', max(0, min(MAX_QUANTITY, quantity)))
+        with self._lock:
+            _combine(self._dirty.setdefault(cart_id, {}), item_id, change)
+            self.stats["mutations"] += 1
+            result = self._view(cart_id, fresh=False)
+            if result is None:
+                # Evicted since get(); the change itself is safe in _dirty
+                result = _apply(before, {item_id: change})
+
+        if self.flush_interval <= 0:
+            self.flush()
+        return result
+
+    def _view(self, cart_id, fresh=True):
+        """Return the resident rows with unwritten changes applied, marking the cart used; lock held
+
+        None when the cart is not resident or, with fresh, its rows are older
+        than refresh_seconds.
+        """
+        rows = self._carts.get(cart_id)
+        if rows is None or (fresh and time.monotonic() - self._loaded[cart_id] >= self.refresh_seconds):
+            return None
+        self._touch(cart_id, rows)
+        cart = _apply(dict(rows), self._flushing.get(cart_id, {}))
+        return _apply(cart, self._dirty.get(cart_id, {}))
+
+    def _touch(self, cart_id, rows, loaded=False):
+        """Make a cart the most recently used and evict idle/excess carts; lock held"""
+        now = time.monotonic()
+        self._carts[cart_id] = rows
+        self._carts.move_to_end(cart_id)
+        self._last_access[cart_id] = now
+        if loaded:
+            self._loaded[cart_id] = now
+
+        while self._carts:
+            oldest_id = next(iter(self._carts))
+            idle = now - self._last_access[oldest_id] > self.idle_seconds
+            if not idle and len(self._carts) <= self.max_carts:
+                break
+            # Unwritten changes stay in _dirty and _flushing
+            del self._carts[oldest_id]
+            del self._last_access[oldest_id]
+            del self._loaded[oldest_id]
+            self.stats["evictions"] += 1
+
+    def _load(self, cart_id):
+        with self.app.app_context():
+            rows = CartItem.query.filter_by(cart_id=cart_id).all()
+        with self._lock:
+            self.stats["loads"] += 1
+        return {row.item_id: row.quantity for row in rows}
+
+    def flush(self):
+        """Write all pending cart changes to the database; returns the number of carts written"""
+        # One flush at a time, so changes to a line commit in order
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._dirty:
+                return 0
+            pending = self._dirty
+            self._dirty = {}
+            self._flushing = pending
+
+        cart_ids = list(pending)
+        lines = 0
+        try:
+            with self.app.app_context():
+                for i in range(0, len(cart_ids), self.flush_batch_size):
+                    lines += self._write(cart_ids[i:i + self.flush_batch_size], pending)
+                db.session.commit()
+        except Exception:
+            # The session is rolled back when the app context is torn down
+            with self._lock:
+                # Put the changes back ahead of any made while we were writing
+                for cart_id in cart_ids:
+                    changes = dict(pending[cart_id])
+                    for item_id, change in self._dirty.get(cart_id, {}).items():
+                        _combine(changes, item_id, change)
+                    self._dirty[cart_id] = changes
+                self._flushing = {}
+            raise
+
+        with self._lock:
+            # The resident rows now match what was just written
+            for cart_id in cart_ids:
+                if cart_id in self._carts:
+                    _apply(self._carts[cart_id], pending[cart_id])
+            self._flushing = {}
+            self.stats["flushes"] += 1
+            self.stats["carts_written"] += len(cart_ids)
+            self.stats["lines_written"] += lines
+        return len(cart_ids)
+
+    def _write(self, cart_ids, pending):
+        """Write one batch of carts' line changes in the current session; returns the lines written"""
+        removed, replaced, added = [], [], []
+        for cart_id in cart_ids:
+            for item_id, (operation, n) in pending[cart_id].items():
+                row = {"cart_id": cart_id, "item_id": item_id, "quantity": n}
+                if operation == 'add':
+                    added.append(row)
+                elif n:
+                    replaced.append(row)
+                else:
+                    removed.append(row)
+
+        table = CartItem.__table__
+        if removed:
+            db.session.execute(
+                delete(table).where(table.c.cart_id == bindparam('cart_id'), table.c.item_id == bindparam('item_id')),
+                [{"cart_id": row["cart_id"], "item_id": row["item_id"]} for row in removed]
+            )
+        upsert = (postgresql if db.engine.dialect.name == 'postgresql' else sqlite).insert(table)
+        total = table.c.quantity + upsert.excluded.quantity
+        if replaced:
+            db.session.execute(upsert.on_conflict_do_update(
+                index_elements=['cart_id', 'item_id'], set_={"quantity": upsert.excluded.quantity}), replaced)
+        if added:
+            db.session.execute(upsert.on_conflict_do_update(
+                index_elements=['cart_id', 'item_id'],
+                set_={"quantity": case((total > MAX_QUANTITY, MAX_QUANTITY), else_=total)}), added)
+        return len(removed) + len(replaced) + len(added)
+
+    def info(self):
+        with self._lock:
+            return {"resident_carts": len(self._carts), "dirty_carts": len(self._dirty), **self.stats}
+
+
+cart_bp = Blueprint('cart', __name__, url_prefix='/api/cart')
+
+
+def _store():
+    return current_app.extensions['cart_store']
+
+
+def _cart_id(create=True):
+    cart_id = session.get('cart_id')
+    if cart_id is None and create:
+        cart_id = uuid.uuid4().hex
+        session['cart_id'] = cart_id
+        _store().create(cart_id)
+    return cart_id
+
+
+def _cart_response(cart):
+    return jsonify({
+        "items": [{"product_id": item_id, "quantity": quantity} for item_id, quantity in cart.items()],
+        "total_quantity": sum(cart.values())
+    })
+
+
+def _product_exists(product_id):
+    return db.session.get(Item, product_id) is not None
+
+
+def _invalid_product_id():
+    return jsonify({"error": "Invalid request", "details": f"product_id must be an integer from 1 to {MAX_ID}"}), 400
+
+
+def _json_object():
+    """Return the request's JSON body if it is an object (a missing body counts as empty), else None"""
+    data = request.get_json(silent=True)
+    if data is None and not request.get_data():
+        return {}
+    return data if isinstance(data, dict) else None
+
+
+def _requested_quantity(data, default):
+    quantity = data.get('quantity', default)
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0:
+        return None
+    return quantity
+
+
+@cart_bp.route('', methods=['GET'])
+def get_cart():
+    """API endpoint to get the session's cart"""
+    cart_id = _cart_id(create=False)
+    return _cart_response(_store().get(cart_id) if cart_id else {})
+
+
+@cart_bp.route('/items', methods=['POST'])
+def add_to_cart():
+    """API endpoint to add a product to the cart: {"product_id": 1, "quantity": 1}"""
+    data = _json_object()
+    if data is None:
+        return jsonify({"error": "Invalid request", "details": "the body must be a JSON object"}), 400
+    product_id = data.get('product_id')
+    quantity = _requested_quantity(data, 1)
+    if not is_valid_id(product_id):
+        return _invalid_product_id()
+    if not quantity:
+        return jsonify({"error": "Invalid request", "details": "quantity must be a positive integer"}), 400
+    if not _product_exists(product_id):
+        return jsonify({"error": "Product not found", "product_id": product_id}), 404
+
+    cart = _store().set_quantity(_cart_id(), product_id, delta=quantity)
+    return _cart_response(cart), 201
+
+
+@cart_bp.route('/items/<int:product_id>', methods=['PUT'])
+def update_cart_item(product_id):
+    """API endpoint to set a product's quantity in the cart: {"quantity": 2}"""
+    if not is_valid_id(product_id):
+        return _invalid_product_id()
+    data = _json_object()
+    quantity = _requested_quantity(data, None) if data is not None else None
+    if quantity is None:
+        return jsonify({"error": "Invalid request", "details": "quantity must be a non-negative integer"}), 400
+    if quantity and not _product_exists(product_id):
+        return jsonify({"error": "Product not found", "product_id": product_id}), 404
+    return _cart_response(_store().set_quantity(_cart_id(), product_id, quantity=quantity))
+
+
+@cart_bp.route('/items/<int:product_id>', methods=['DELETE'])
+def remove_from_cart(product_id):
+    """API endpoint to remove a product from the cart"""
+    if not is_valid_id(product_id):
+        return _invalid_product_id()
+    cart_id = _cart_id(create=False)
+    if cart_id is None:
+        return _cart_response({})
+    return _cart_response(_store().set_quantity(cart_id, product_id, quantity=0))
+
+
+def init_cart(app):
+    """Create the app's cart store and register the cart routes"""
+    store = CartStore(
+        app,
+        max_carts=int(os.getenv('CART_MAX_CARTS', '10000')),
+        idle_seconds=float(os.getenv('CART_IDLE_SECONDS', '1800')),
+        flush_interval=float(os.getenv('CART_FLUSH_INTERVAL', '2')),
+        refresh_seconds=float(os.getenv('CART_REFRESH_SECONDS', '2'))
+    )
+    app.extensions['cart_store'] = store
+    app.before_request(store.start)
+    atexit.register(store.flush)
+    app.register_blueprint(cart_bp)
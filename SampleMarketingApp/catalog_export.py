@@ -0,0 +1,316 @@
+"""
+Precomputed catalog snapshot served as a static file
+
+Enabled with CATALOG_EXPORT=<directory> for read-mostly deployments. The
+/api/items JSON and the featured items shown by home() are written to
+files named after the catalog version:
+
+    items-<version>.json      the exact body /api/items would return
+    featured-<version>.json   the featured list used by home()
+    current.json              manifest naming the files and their ETags
+
+Each manifest entry records the catalog version it was exported at. Files
+are written under temporary names and renamed into place, and the manifest
+is swapped after each one, so a reader sees either the old file or the new
+one, never a partial file. Exports never run inside a request: when an
+entry does not match the version the request reads (catalog_version(),
+which is the snapshot's version under SQLITE_SNAPSHOT), the request is
+answered from the database and a background thread in that worker exports
+from the primary engine. The small featured list is written before the
+items, and an flock on the directory keeps other workers from exporting
+at the same time.
+
+/api/items (without ?ids=) is then answered from the file: with Flask's
+send_file, which gunicorn turns into sendfile(2), or with an
+X-Accel-Redirect header when CATALOG_EXPORT_ACCEL_PREFIX names an nginx
+internal location aliased to the directory. Either way the response has a
+strong ETag from the file's content and If-None-Match gets a 304.
+
+    python catalog_export.py    export the current catalog once, e.g. at deploy
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from functools import partial
+
+from flask import current_app, jsonify, request, send_file
+from sqlalchemy import select
+
+from catalog_version import catalog_version
+from models import db, Item
+from per_process import PerProcess, start_daemon
+from views import featured_items
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'current.json'
+LOCK_FILE = '.export.lock'
+SNAPSHOT_FILE = re.compile(r'^(items|featured)-([0-9a-z]+)\.json$')
+CHUNK_ITEMS = 1000
+RETRY_SECONDS = 5
+
+
+class CatalogExporter:
+    """Writes versioned catalog snapshots and tracks the current one"""
+
+    def __init__(self, directory, accel_prefix=None, export_featured=True):
+        self.directory = directory
+        self.accel_prefix = accel_prefix.rstrip('/') + '/' if accel_prefix else None
+        self.export_featured = export_featured
+        self.manifest = None
+        self.manifest_mtime = None
+        self.featured_cache = None
+        self.served = 0
+        self.fallbacks = 0
+        self.exports = 0
+        self._wanted = None
+        self._thread = PerProcess(self._start_thread)
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write_atomic(self, name, chunks):
+        """Write chunks to a temporary file and rename it to name; return (digest, size)"""
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.' + name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    data = chunk.encode('utf-8')
+                    digest.update(data)
+                    size += len(data)
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, self._path(name))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return digest.hexdigest(), size
+
+    def _write_entry(self, kind, version, chunks):
+        name = f"{kind}-{version}.json"
+        etag, size = self._write_atomic(name, chunks)
+        return {"file": name, "etag": etag, "size": size, "version": version, "exported_at": time.time()}
+
+    @staticmethod
+    def _dumps(value):
+        # jsonify's compact (non-debug) output
+        return current_app.json.dumps(value, separators=(',', ':'))
+
+    def _items_json(self):
+        """Yield the /api/items body in pieces, byte-for-byte what jsonify produces"""
+        dumps = self._dumps
+        items = db.session.execute(select(Item).execution_options(yield_per=CHUNK_ITEMS)).scalars()
+        yield "["
+        first = True
+        for partition in items.partitions():
+            chunk = ",".join(dumps(item.to_dict()) for item in partition)
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]\n"
+
+    def export(self, version):
+        """Write the featured list and then the items for version, swapping the manifest after each
+
+        Reads go through db.session, so outside a request they use the
+        primary engine, whose data is at least as new as version.
+        """
+        start = time.perf_counter()
+        previous = self._load_manifest()
+        manifest = dict(previous or {})
+        if self.export_featured and manifest.get("featured", {}).get("version") != version:
+            body = self._dumps([item.to_dict() for item in featured_items()])
+            manifest["featured"] = self._write_entry("featured", version, [body])
+            self._write_atomic(MANIFEST, [json.dumps(manifest, indent=2)])
+        if manifest.get("items", {}).get("version") != version:
+            manifest["items"] = self._write_entry("items", version, self._items_json())
+            self._write_atomic(MANIFEST, [json.dumps(manifest, indent=2)])
+
+        self._remove_old(manifest, previous)
+        self.exports += 1
+        logger.info("Exported catalog version %s (%d bytes) in %.2f seconds",
+                    version, manifest["items"]["size"], time.perf_counter() - start)
+        return manifest
+
+    def _remove_old(self, manifest, previous):
+        # Keep the previous files: another worker may be about to open them
+        keep = {entry["file"] for m in (manifest, previous) if m
+                for entry in (m.get("items"), m.get("featured")) if entry}
+        for name in os.listdir(self.directory):
+            if SNAPSHOT_FILE.match(name) and name not in keep:
+                try:
+                    os.unlink(self._path(name))
+                except FileNotFoundError:
+                    pass
+
+    def _load_manifest(self):
+        """Re-read the manifest if another process has swapped it"""
+        try:
+            mtime = os.stat(self._path(MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self.manifest_mtime:
+            with open(self._path(MANIFEST), encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            self.manifest_mtime = mtime
+        return self.manifest
+
+    def refresh(self):
+        """Export the current catalog version unless the manifest has it or another process is exporting
+
+        Returns the manifest, or None when another process holds the lock.
+        """
+        version = catalog_version()
+        if version == "unavailable":
+            return None
+        lock_fd = os.open(self._path(LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            manifest = self._load_manifest()
+            if manifest is None or any(manifest.get(kind, {}).get("version") != version for kind in self._kinds()):
+                manifest = self.export(version)
+            return manifest
+        finally:
+            os.close(lock_fd)
+
+    def _kinds(self):
+        return ("featured", "items") if self.export_featured else ("items",)
+
+    def _start_thread(self):
+        self._wanted = threading.Event()
+        return start_daemon(partial(self._run, current_app._get_current_object()), 'catalog-export')
+
+    def _run(self, app):
+        while True:
+            self._wanted.wait()
+            self._wanted.clear()
+            try:
+                # A fresh app context has no g.catalog_version or read engine,
+                # so the export reads the primary database
+                with app.app_context():
+                    self.refresh()
+            except Exception as e:
+                logger.error("Catalog export failed: %s", e)
+                time.sleep(RETRY_SECONDS)
+
+    def entry(self, kind):
+        """Return the manifest entry for kind if it matches the catalog version this request reads
+
+        Otherwise ask this worker's export thread to catch up and return
+        None, meaning: answer from the database.
+        """
+        version = catalog_version()
+        manifest = self.manifest
+        if manifest is None or manifest.get(kind, {}).get("version") != version:
+            manifest = self._load_manifest()
+        entry = manifest.get(kind) if manifest is not None else None
+        if entry is not None and entry["version"] == version:
+            return entry
+        if version != "unavailable":
+            self._thread()
+            self._wanted.set()
+        return None
+
+    def featured(self):
+        """Featured items from the current snapshot as dicts, or None"""
+        if not self.export_featured:
+            return None
+        try:
+            entry = self.entry("featured")
+            if entry is None:
+                return None
+            cached = self.featured_cache
+            if cached is None or cached[0] != entry["file"]:
+                with open(self._path(entry["file"]), encoding='utf-8') as f:
+                    cached = self.featured_cache = (entry["file"], json.load(f))
+            return cached[1]
+        except OSError as e:
+            logger.error("Catalog snapshot unavailable: %s", e)
+            return None
+
+    def info(self):
+        manifest = self._load_manifest()
+        return {
+            "directory": self.directory,
+            "accel_prefix": self.accel_prefix,
+            "manifest": manifest,
+            "catalog_version": catalog_version(),
+            # Counters below are for this worker process only
+            "served": self.served,
+            "fallbacks": self.fallbacks,
+            "exports": self.exports
+        }
+
+
+def _serve_snapshot():
+    if request.method not in ('GET', 'HEAD') or request.endpoint != 'get_items' or 'ids' in request.args:
+        return None
+    exporter = current_app.extensions['catalog_export']
+    try:
+        entry = exporter.entry("items")
+    except OSError as e:
+        logger.error("Catalog snapshot unavailable: %s", e)
+        entry = None
+    if entry is None:
+        exporter.fallbacks += 1
+        return None
+
+    if exporter.accel_prefix:
+        response = current_app.response_class(mimetype='application/json')
+        response.headers['X-Accel-Redirect'] = exporter.accel_prefix + entry["file"]
+        response.set_etag(entry["etag"])
+        # Answer revalidations here; nginx only sees requests that need the body
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            del response.headers['X-Accel-Redirect']
+    else:
+        response = send_file(exporter._path(entry["file"]), mimetype='application/json',
+                             etag=entry["etag"], conditional=True)
+    response.cache_control.no_cache = True
+    exporter.served += 1
+    return response
+
+
+def export_stats():
+    """API endpoint reporting the current catalog snapshot"""
+    return jsonify(current_app.extensions['catalog_export'].info())
+
+
+def init_catalog_export(app):
+    """Serve /api/items from an exported snapshot when CATALOG_EXPORT is set"""
+    directory = os.getenv('CATALOG_EXPORT')
+    if not directory:
+        return
+
+    app.extensions['catalog_export'] = CatalogExporter(
+        directory,
+        accel_prefix=os.getenv('CATALOG_EXPORT_ACCEL_PREFIX') or None,
+        export_featured=os.getenv('CATALOG_EXPORT_FEATURED', '1') not in ('', '0')
+    )
+    app.before_request(_serve_snapshot)
+    app.add_url_rule('/api/diagnostics/catalog-export', 'catalog_export_stats', export_stats)
+
+
+if __name__ == '__main__':
+    from factory import create_app
+
+    if not os.getenv('CATALOG_EXPORT'):
+        raise SystemExit("Set CATALOG_EXPORT to the snapshot directory")
+    export_app = create_app(faults=False)
+    with export_app.app_context():
+        exported = export_app.extensions['catalog_export'].refresh()
+    print(json.dumps(exported, indent=2) if exported else "Another process is exporting; try again shortly")
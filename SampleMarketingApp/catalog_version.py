@@ -0,0 +1,142 @@
+"""
+Catalog version tracking for caches and exported snapshots
+
+catalog_version() returns a short string that changes whenever the items
+table may have changed, without reading the catalog itself:
+
+    SQLite      the catalog_meta row that triggers on items bump (see
+                models.create_catalog_meta), re-read whenever the database
+                or WAL file's mtime or size changes and at least every
+                CATALOG_VERSION_TTL seconds, since a commit can land in the
+                same mtime tick without changing the size; databases without
+                the row fall back to the files' modification time and size
+    PostgreSQL  the table's filenode and insert/update/delete counters from
+                pg_stat_user_tables, re-read at most every CATALOG_VERSION_TTL
+                seconds (default 2)
+    others      count(*) and max(id) of items, on the same interval
+
+Writes to other tables, such as cart flushes, keep the version. A request
+that reads from an older copy of the catalog (sqlite_tuning's snapshot)
+sets g.catalog_version to that copy's version, so caches keyed on it never
+file the older data under the newer version.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db
+
+POSTGRES_QUERY = text(
+    "SELECT pg_relation_filenode('items'), n_tup_ins, n_tup_upd, n_tup_del "
+    "FROM pg_stat_user_tables WHERE relname = 'items'"
+)
+GENERIC_QUERY = text("SELECT count(*), max(id) FROM items")
+SQLITE_META_QUERY = "SELECT epoch, version FROM catalog_meta WHERE id = 1"
+
+
+def sqlite_file_signature(path):
+    """Return (mtime_ns, size) of an SQLite database and its WAL file"""
+    # Commits append to the WAL file; checkpoints rewrite the database. An
+    # empty WAL is created and removed as connections open and close, and
+    # holds nothing the database file does not, so it counts as missing.
+    signature = []
+    for suffix in ('', '-wal'):
+        try:
+            stat = os.stat(path + suffix)
+            signature.append((stat.st_mtime_ns, stat.st_size) if stat.st_size or not suffix else None)
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode(), digest_size=8).hexdigest()
+
+
+def sqlite_catalog_version(connection, signature):
+    """Return the catalog version read through an SQLite DB-API connection
+
+    signature is the file signature taken before the read, used when the
+    database has no catalog_meta row.
+    """
+    cursor = connection.cursor()
+    try:
+        row = cursor.execute(SQLITE_META_QUERY).fetchone()
+    except sqlite3.OperationalError as e:
+        if not str(e).startswith('no such table'):
+            raise
+        row = None
+    finally:
+        cursor.close()
+    return _digest(tuple(row)) if row else _digest(signature)
+
+
+class CatalogVersion:
+    """Per-app catalog version, cached for ttl seconds where it costs a query"""
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self.value = None
+        self.checked = 0
+        self.signature = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        engine = db.engine
+        path = engine.url.database
+        if engine.dialect.name == 'sqlite' and path and path != ':memory:':
+            return self._sqlite(engine, path)
+
+        now = time.monotonic()
+        if self.value is not None and now - self.checked < self.ttl:
+            return self.value
+        with self._lock:
+            if self.value is None or now - self.checked >= self.ttl:
+                query = POSTGRES_QUERY if engine.dialect.name == 'postgresql' else GENERIC_QUERY
+                try:
+                    with engine.connect() as connection:
+                        self.value = _digest(tuple(connection.execute(query).first() or ()))
+                except SQLAlchemyError:
+                    # Retry on the next call rather than caching a failure
+                    return "unavailable"
+                self.checked = now
+        return self.value
+
+    def _sqlite(self, engine, path):
+        # A changed stat means a write; an unchanged one only usually means none
+        signature = sqlite_file_signature(path)
+        now = time.monotonic()
+        if signature == self.signature and now - self.checked < self.ttl:
+            return self.value
+        with self._lock:
+            if signature != self.signature or now - self.checked >= self.ttl:
+                try:
+                    connection = engine.raw_connection()
+                    try:
+                        self.value = sqlite_catalog_version(connection, signature)
+                    finally:
+                        connection.close()
+                except (SQLAlchemyError, sqlite3.Error):
+                    return "unavailable"
+                self.signature = signature
+                self.checked = now
+        return self.value
+
+
+def catalog_version():
+    """Return the version of the catalog this request reads"""
+    version = g.get('catalog_version')
+    if version is not None:
+        return version
+    tracker = current_app.extensions.get('catalog_version')
+    if tracker is None:
+        tracker = current_app.extensions.setdefault(
+            'catalog_version', CatalogVersion(float(os.getenv('CATALOG_VERSION_TTL', '2'))))
+    return tracker.get()
@@ -0,0 +1,272 @@
+"""
+Asyncio connection-storm generator for the SNAT fault
+
+Opens many concurrent outbound HTTP connections against a target URL and
+measures where outbound port pressure starts. Without a target URL a local
+stand-in HTTP server is started on the loopback interface, so the storm can
+be reproduced without depending on an external site.
+
+Two connection strategies are supported:
+    per-request: every request opens a fresh connection and closes it,
+                 which is what exhausts SNAT/ephemeral ports
+    pooled:      each concurrent worker keeps one keep-alive connection
+                 open and reuses it for all of its requests
+"""
+
+import asyncio
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from procfs import read_ephemeral_port_range, read_tcp_sockets
+
+STRATEGIES = ('per-request', 'pooled')
+# Upper bounds for a single storm; the endpoint is reachable by anyone who can reach the app
+MAX_CONCURRENCY = 1000
+MAX_TOTAL = 100000
+SAMPLE_INTERVAL = 0.1  # Seconds between ephemeral port samples
+
+_STANDIN_RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n"
+
+
+async def _standin_handler(reader, writer):
+    """Answer every request on a connection with a tiny 200 response"""
+    try:
+        while True:
+            request_head = await reader.readuntil(b"\r\n\r\n")
+            keep_alive = b"connection: close" not in request_head.lower()
+            writer.write(_STANDIN_RESPONSE
+                         + (b"Connection: keep-alive\r\n\r\nOK" if keep_alive else b"Connection: close\r\n\r\nOK"))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response; return (status, reusable)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed before response")
+    status = int(status_line.split()[1])
+
+    content_length = None
+    chunked = False
+    reusable = True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        value = value.strip().lower()
+        if name == 'content-length':
+            content_length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            reusable = False
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif content_length is not None:
+        await reader.readexactly(content_length)
+    else:
+        await reader.read()
+        reusable = False
+    return status, reusable
+
+
+class _Storm:
+    """State shared by the workers of one connection storm"""
+
+    def __init__(self, url, total, strategy, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.total = total
+        self.strategy = strategy
+        self.timeout = timeout
+
+        self.issued = 0
+        self.successful = 0
+        self.failed = 0
+        self.connections_opened = 0
+        self.connect_latencies = []
+        self.errors = {}
+
+    def _request_bytes(self, keep_alive):
+        connection = 'keep-alive' if keep_alive else 'close'
+        return (f"GET {self.path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"User-Agent: SampleMarketingApp-connection-storm\r\n"
+                f"Connection: {connection}\r\n\r\n").encode('latin-1')
+
+    def _record_error(self, error):
+        self.failed += 1
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def _connect(self):
+        start = time.perf_counter()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+        self.connect_latencies.append(time.perf_counter() - start)
+        self.connections_opened += 1
+        return reader, writer
+
+    def _next_request(self):
+        if self.issued >= self.total:
+            return False
+        self.issued += 1
+        return True
+
+    async def per_request_worker(self):
+        while self._next_request():
+            writer = None
+            try:
+                reader, writer = await self._connect()
+                writer.write(self._request_bytes(keep_alive=False))
+                status, _ = await asyncio.wait_for(_read_response(reader), self.timeout)
+                if status < 400:
+                    self.successful += 1
+                else:
+                    self.failed += 1
+            except Exception as e:
+                self._record_error(e)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    async def pooled_worker(self):
+        reader = writer = None
+        try:
+            while self._next_request():
+                try:
+                    if writer is None:
+                        reader, writer = await self._connect()
+                    writer.write(self._request_bytes(keep_alive=True))
+                    status, reusable = await asyncio.wait_for(_read_response(reader), self.timeout)
+                    if status < 400:
+                        self.successful += 1
+                    else:
+                        self.failed += 1
+                except Exception as e:
+                    self._record_error(e)
+                    reusable = False
+                if not reusable and writer is not None:
+                    writer.close()
+                    reader = writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+def _count_ephemeral_ports(target_port, port_range):
+    """Count sockets from the ephemeral range to the target port, by TCP state"""
+    low, high = port_range
+    counts = {}
+    for local_port, remote_port, state, _ in read_tcp_sockets():
+        if remote_port == target_port and low <= local_port <= high:
+            counts[state] = counts.get(state, 0) + 1
+    return counts
+
+
+def _percentiles_ms(values):
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def pick(p):
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+    return {
+        "p50": round(pick(50) * 1000, 2),
+        "p90": round(pick(90) * 1000, 2),
+        "p99": round(pick(99) * 1000, 2),
+        "max": round(values[-1] * 1000, 2)
+    }
+
+
+async def _run(url, concurrency, total, strategy, timeout):
+    server = None
+    if not url:
+        server = await asyncio.start_server(_standin_handler, '127.0.0.1', 0, backlog=4096)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+    storm = _Storm(url, total, strategy, timeout)
+    port_range = read_ephemeral_port_range()
+    peak = {"in_use": 0, "by_state": {}, "last": {}}
+    done = asyncio.Event()
+
+    async def sample_ports():
+        while True:
+            counts = await asyncio.to_thread(_count_ephemeral_ports, storm.port, port_range)
+            in_use = sum(counts.values())
+            peak["last"] = counts
+            if in_use > peak["in_use"]:
+                peak["in_use"] = in_use
+                peak["by_state"] = counts
+            if done.is_set():
+                break
+            try:
+                await asyncio.wait_for(done.wait(), SAMPLE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    sampler = asyncio.create_task(sample_ports())
+    worker = storm.pooled_worker if strategy == 'pooled' else storm.per_request_worker
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        await sampler
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    return {
+        "url": url,
+        "strategy": strategy,
+        "concurrency": concurrency,
+        "total_requests": total,
+        "successful_calls": storm.successful,
+        "failed_calls": storm.failed,
+        "errors": storm.errors,
+        "connections_opened": storm.connections_opened,
+        "elapsed_seconds": round(elapsed, 3),
+        "connections_per_second": round(storm.connections_opened / elapsed, 1) if elapsed else None,
+        "requests_per_second": round((storm.successful + storm.failed) / elapsed, 1) if elapsed else None,
+        "connect_latency_ms": _percentiles_ms(storm.connect_latencies),
+        "ephemeral_port_range": list(port_range),
+        "peak_ephemeral_ports_in_use": peak["in_use"],
+        "peak_ephemeral_ports_by_state": peak["by_state"],
+        "ephemeral_ports_after_by_state": peak["last"]
+    }
+
+
+def is_http_url(url):
+    """True for an http(s) URL with a host"""
+    parts = urlsplit(url)
+    return parts.scheme in ('http', 'https') and bool(parts.hostname)
+
+
+def run_connection_storm(url=None, concurrency=100, total=1000, strategy='per-request', timeout=10):
+    """Run a connection storm and return throughput, port usage and latency stats"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+    if not 0 < concurrency <= MAX_CONCURRENCY or not 0 < total <= MAX_TOTAL:
+        raise ValueError(f"concurrency must be 1-{MAX_CONCURRENCY} and total 1-{MAX_TOTAL}")
+    if url and not is_http_url(url):
+        raise ValueError("url must be an http or https URL")
+    return asyncio.run(_run(url, concurrency, total, strategy, timeout))
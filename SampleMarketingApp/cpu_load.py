@@ -0,0 +1,112 @@
+"""
+Multi-process CPU load generator for the high CPU fault
+
+Each worker process runs a duty-cycle controller: within every control
+period it spins until it has consumed its share of CPU time, then sleeps
+for the rest of the period. Work happens in separate processes so the
+load is not capped at one core by the GIL.
+"""
+
+import multiprocessing
+import os
+import time
+
+from procfs import read_cpu_times
+
+DEFAULT_PERIOD = 0.1  # Length of one duty cycle in seconds
+
+
+def _duty_cycle_worker(utilization, duration, period, core):
+    """Hold one core at the requested utilization for the given duration"""
+    if core is not None:
+        try:
+            os.sched_setaffinity(0, {core})
+        except (AttributeError, OSError):
+            pass
+
+    deadline = time.monotonic() + duration
+    while True:
+        period_start = time.monotonic()
+        if period_start >= deadline:
+            break
+        period_end = min(period_start + period, deadline)
+        busy_budget = (period_end - period_start) * utilization
+        cpu_start = time.process_time()
+
+        # Spin on integer arithmetic until this period's CPU budget is used.
+        # Measuring process time rather than wall time means a throttled
+        # worker keeps trying to reach its target instead of under-shooting.
+        x = 0
+        while time.process_time() - cpu_start < busy_budget:
+            for i in range(2000):
+                x = (x * 31 + i) & 0xFFFFFFFF
+            if time.monotonic() >= period_end:
+                break
+
+        remaining = period_end - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+def available_cores():
+    """Return the CPUs this process may run on"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 4))
+
+
+def run_cpu_load(utilization=100, workers=None, duration=30, period=DEFAULT_PERIOD, pin=True):
+    """Run duty-cycle worker processes and report the CPU time they achieved
+
+    utilization is the target percentage per core (1-100) and workers is the
+    number of cores to load, at most the cores available and defaulting to
+    all of them.
+    """
+    cores = available_cores()
+    workers = workers or len(cores)
+    if not 1 <= utilization <= 100:
+        raise ValueError("utilization must be between 1 and 100")
+    if not 0 < workers <= len(cores):
+        raise ValueError(f"workers must be between 1 and {len(cores)}")
+    if duration <= 0:
+        raise ValueError("duration must be positive")
+
+    # fork keeps worker startup cheap and avoids re-importing the web app
+    ctx = multiprocessing.get_context('fork')
+    before = read_cpu_times()
+    start_time = time.monotonic()
+
+    processes = []
+    for i in range(workers):
+        core = cores[i] if pin else None
+        process = ctx.Process(
+            target=_duty_cycle_worker,
+            args=(utilization / 100.0, duration, period, core),
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+
+    elapsed = time.monotonic() - start_time
+    after = read_cpu_times()
+
+    # Children's CPU time is accounted to us once they have been joined
+    user = after['children_user'] - before['children_user']
+    system = after['children_system'] - before['children_system']
+    cpu_seconds = user + system
+    achieved = cpu_seconds / (elapsed * workers) * 100 if elapsed > 0 else 0.0
+
+    return {
+        "workers": workers,
+        "target_utilization_percent": utilization,
+        "achieved_utilization_percent": round(achieved, 1),
+        "duration_seconds": round(elapsed, 2),
+        "cpu_user_seconds": round(user, 2),
+        "cpu_system_seconds": round(system, 2),
+        "cpu_seconds": round(cpu_seconds, 2),
+        "failed_workers": sum(1 for p in processes if p.exitcode != 0)
+    }
@@ -0,0 +1,146 @@
+"""
+Process resource telemetry read from /proc/self
+
+Used by /api/diagnostics/resources so fault and load runs can be
+correlated with the app's own resource usage without outside agents.
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from flask import Blueprint, current_app, jsonify, request
+
+from logging_config import logging_stats
+from per_process import PerProcess, start_daemon
+from procfs import read_cpu_times, read_status, read_tcp_sockets
+from tracing import tracing_stats
+
+logger = logging.getLogger(__name__)
+
+
+def _socket_inodes():
+    """Return the open file descriptor count and the inodes of our sockets"""
+    fd_count = 0
+    inodes = set()
+    try:
+        fds = os.listdir('/proc/self/fd')
+    except OSError:
+        return None, inodes
+    for fd in fds:
+        fd_count += 1
+        try:
+            target = os.readlink(f'/proc/self/fd/{fd}')
+        except OSError:
+            continue  # The descriptor was closed while we were listing
+        if target.startswith('socket:['):
+            inodes.add(int(target[8:-1]))
+    return fd_count, inodes
+
+
+def collect_resources():
+    """Take a snapshot of this process's resource usage"""
+    status = read_status()
+    cpu = read_cpu_times()
+    fd_count, inodes = _socket_inodes()
+
+    sockets = {}
+    if inodes:
+        for _, _, state, inode in read_tcp_sockets():
+            if inode in inodes:
+                sockets[state] = sockets.get(state, 0) + 1
+
+    def mb(key):
+        return round(status[key] / 1024, 1) if key in status else None
+
+    def number(key):
+        return int(status[key]) if key in status else None
+
+    return {
+        "timestamp": round(time.time(), 3),
+        "pid": os.getpid(),
+        "memory": {
+            "rss_mb": mb('VmRSS'),
+            "hwm_mb": mb('VmHWM'),
+            "vm_size_mb": mb('VmSize')
+        },
+        "threads": number('Threads') or threading.active_count(),
+        "python_threads": threading.active_count(),
+        "open_fds": fd_count,
+        "tcp_sockets": sockets,
+        "cpu": {
+            "user_seconds": round(cpu['user'], 2),
+            "system_seconds": round(cpu['system'], 2),
+            "children_user_seconds": round(cpu['children_user'], 2),
+            "children_system_seconds": round(cpu['children_system'], 2)
+        },
+        "context_switches": {
+            "voluntary": number('voluntary_ctxt_switches'),
+            "involuntary": number('nonvoluntary_ctxt_switches')
+        },
+        "logging": logging_stats(),
+        "tracing": tracing_stats(),
+        "gc": {
+            "counts": list(gc.get_count()),
+            "collections": [stats['collections'] for stats in gc.get_stats()],
+            "collected": [stats['collected'] for stats in gc.get_stats()],
+            "uncollectable": [stats['uncollectable'] for stats in gc.get_stats()]
+        }
+    }
+
+
+class ResourceHistory:
+    """Short rolling buffer of resource snapshots sampled by a daemon thread"""
+
+    def __init__(self, interval=5.0, size=60):
+        self.interval = interval
+        self.samples = deque(maxlen=size)
+        self._thread = PerProcess(lambda: start_daemon(self._run, 'resource-history'))
+
+    def start(self):
+        self._thread()
+
+    def _run(self):
+        while True:
+            try:
+                self.samples.append(collect_resources())
+            except Exception as e:
+                logger.error("Resource history sampling failed: %s", e)
+            time.sleep(self.interval)
+
+    def snapshot(self):
+        return list(self.samples)
+
+
+def history_from_env():
+    """Build a ResourceHistory from RESOURCE_HISTORY_INTERVAL/SIZE, or None when disabled"""
+    interval = float(os.getenv('RESOURCE_HISTORY_INTERVAL', '0') or 0)
+    if interval <= 0:
+        return None
+    size = int(os.getenv('RESOURCE_HISTORY_SIZE', '60') or 60)
+    return ResourceHistory(interval=interval, size=size)
+
+
+diagnostics_bp = Blueprint('diagnostics', __name__, url_prefix='/api/diagnostics')
+
+
+@diagnostics_bp.route('/resources')
+def resources():
+    """API endpoint reporting this process's resource usage from /proc/self"""
+    result = collect_resources()
+    if request.args.get('history') in ('1', 'true'):
+        history = current_app.extensions.get('resource_history')
+        result["history"] = history.snapshot() if history is not None else []
+    return jsonify(result)
+
+
+def init_diagnostics(app):
+    """Register the diagnostics routes and the optional resource history sampler"""
+    history = history_from_env()
+    if history is not None:
+        app.extensions['resource_history'] = history
+        app.before_request(history.start)
+    app.register_blueprint(diagnostics_bp)
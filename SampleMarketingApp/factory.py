@@ -0,0 +1,138 @@
+"""
+Application factory for SampleMarketingApp
+
+create_app() builds a configured Flask app with the shared models and the
+catalog routes. The database backend is chosen by config:
+
+    DB_BACKEND=postgresql  use DATABASE_URL (default)
+    DB_BACKEND=sqlite      use SQLITE_DATABASE_URL (default sqlite:///marketing_app.db)
+
+With SQLITE_TUNED=1 the SQLite backend runs in the tuned serving mode
+described in sqlite_tuning.py.
+
+Fault routes are registered as a blueprint whose view functions live in
+faults.py, which is only imported when one of them is first requested.
+"""
+
+import os
+
+from dotenv import load_dotenv
+from flask import Blueprint, Flask
+from werkzeug.utils import cached_property, import_string
+
+from logging_config import setup_logging
+from models import db
+
+BACKENDS = ('postgresql', 'sqlite')
+
+# (rule, view function in faults.py)
+FAULT_ROUTES = [
+    ('/highmemory', 'high_memory_fault'),
+    ('/snat', 'snat_fault'),
+    ('/highcpu', 'high_cpu_fault'),
+    ('/threads', 'thread_exhaustion_fault'),
+    ('/badwrite', 'bad_write_fault'),
+    ('/badtls', 'bad_tls_fault'),
+    ('/slowcall', 'slow_call_fault')
+]
+
+
+class LazyView:
+    """View that imports its implementation on first call"""
+
+    def __init__(self, import_name):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def database_uri(backend):
+    """Return the SQLAlchemy URI for a database backend"""
+    if backend == 'sqlite':
+        return os.getenv('SQLITE_DATABASE_URL', 'sqlite:///marketing_app.db')
+    return os.getenv('DATABASE_URL')
+
+
+def register_faults(app):
+    """Register the fault routes without importing faults.py yet"""
+    faults_bp = Blueprint('faults', __name__, url_prefix='/api/faults')
+    for rule, name in FAULT_ROUTES:
+        faults_bp.add_url_rule(rule, name, LazyView(f'faults.{name}'))
+    app.register_blueprint(faults_bp)
+
+
+def create_app(backend=None, config=None, faults=True):
+    """Create and configure the Flask app
+
+    backend overrides DB_BACKEND, config is a dict applied last, and
+    faults=False leaves out the fault injection routes.
+    """
+    load_dotenv()
+    setup_logging()
+
+    backend = backend or os.getenv('DB_BACKEND', 'postgresql')
+    if backend not in BACKENDS:
+        raise ValueError(f"DB_BACKEND must be one of {', '.join(BACKENDS)}")
+
+    app = Flask(__name__)
+
+    # Database configuration
+    app.config['DB_BACKEND'] = backend
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(backend)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
+    app.config['PRODUCTS_ENABLED'] = os.getenv('PRODUCTS_ENABLED', '0') not in ('', '0')
+    app.config['MAX_BATCH_IDS'] = int(os.getenv('MAX_BATCH_IDS', '100'))
+    app.config['PRODUCTS_PAGE_SIZE'] = int(os.getenv('PRODUCTS_PAGE_SIZE', '24'))
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+
+    # First, so captured timings and request spans cover every other hook
+    from traffic_capture import init_capture
+    init_capture(app)
+
+    from tracing import init_tracing
+    init_tracing(app)
+
+    if backend == 'sqlite':
+        from sqlite_tuning import init_sqlite_tuning
+        init_sqlite_tuning(app)
+
+    # Snapshot responses come before the shared cache and admission control
+    from catalog_export import init_catalog_export
+    init_catalog_export(app)
+
+    # Registered before admission control so cache hits are never shed
+    from shared_cache import init_shared_cache
+    init_shared_cache(app)
+
+    from admission import init_admission
+    init_admission(app)
+
+    from views import register_routes
+    register_routes(app)
+
+    from cart import init_cart
+    init_cart(app)
+
+    from diagnostics import init_diagnostics
+    init_diagnostics(app)
+
+    from health import init_health
+    init_health(app)
+
+    from memory_profiling import init_memory_profiling
+    init_memory_profiling(app)
+
+    if faults:
+        register_faults(app)
+
+    return app
@@ -0,0 +1,564 @@
+"""
+Fault injection endpoints for SampleMarketingApp
+
+This module is imported lazily the first time a /api/faults route is hit
+(see factory.register_faults), so the app does not pay for requests and
+the fault helpers at startup.
+"""
+
+from flask import jsonify, request
+import logging
+import os
+import requests
+import sys
+
+logger = logging.getLogger(__name__)
+
+def high_memory_fault():
+    """Endpoint that allocates 1GB of memory repeatedly until crash
+
+    Passing target_mb switches to a controlled mode that ramps RSS to the
+    target at ramp_mb_per_s (default 256), holds it for hold_seconds
+    (default 30) and then releases it.
+    """
+    try:
+        if 'target_mb' in request.args:
+            return controlled_memory_pressure()
+
+        logger.info("Starting high memory allocation...")
+        memory_blocks = []
+        block_size = 1024 * 1024 * 1024  # 1GB
+        count = 0
+        
+        while True:
+            try:
+                count += 1
+                logger.info("Allocating block %d (1GB)...", count, extra={"sample": "highmemory.block"})
+                # Allocate 1GB of memory
+                memory_block = bytearray(block_size)
+                memory_blocks.append(memory_block)
+                # Force the memory to be actually used
+                for i in range(0, block_size, 1024):
+                    memory_block[i] = 1
+            except MemoryError:
+                logger.error("Memory allocation failed after %s blocks", count)
+                break
+            except Exception as e:
+                logger.error("Unexpected error during memory allocation: %s", e)
+                break
+        
+        return jsonify({"message": f"Memory allocation stopped after {count} blocks", "allocated_gb": count})
+    
+    except Exception as e:
+        logger.error("High memory fault endpoint failed: %s", e)
+        return jsonify({"error": "High memory fault failed", "details": str(e)}), 500
+
+def controlled_memory_pressure():
+    """Run the controlled memory-pressure mode of the high memory fault"""
+    target_mb = request.args.get('target_mb', type=float)
+    ramp_mb_per_s = request.args.get('ramp_mb_per_s', 256, type=float)
+    hold_seconds = request.args.get('hold_seconds', 30, type=float)
+
+    if not target_mb or target_mb <= 0 or ramp_mb_per_s <= 0 or hold_seconds < 0:
+        return jsonify({
+            "error": "Invalid parameters",
+            "details": "target_mb and ramp_mb_per_s must be positive and hold_seconds non-negative"
+        }), 400
+
+    logger.info("Starting controlled memory pressure: target %sMB RSS at %sMB/s, holding for %s seconds...",
+                target_mb, ramp_mb_per_s, hold_seconds)
+
+    from memory_pressure import run_memory_pressure
+    stats = run_memory_pressure(target_mb, ramp_mb_per_s=ramp_mb_per_s, hold_seconds=hold_seconds)
+
+    logger.info("Memory pressure completed: peak RSS %sMB, RSS after release %sMB (%s)",
+                stats['rss_peak_mb'], stats['rss_after_mb'], stats['stop_reason'])
+    return jsonify({"message": f"Memory pressure held at {stats['rss_peak_mb']}MB RSS", **stats})
+
+def snat_fault():
+    """Endpoint that creates multiple HttpClient instances and makes calls to www.bing.com
+
+    Passing mode=storm switches to a concurrent asyncio connection storm
+    instead (see connection_storm_fault).
+    """
+    try:
+        if request.args.get('mode') == 'storm':
+            return connection_storm_fault()
+
+        logger.info("Starting SNAT port exhaustion test...")
+        
+        successful_calls = 0
+        failed_calls = 0
+        total_calls = 500
+        
+        for i in range(total_calls):
+            try:
+                # Create a new session for each request to simulate creating new HttpClient instances
+                session = requests.Session()
+                
+                logger.info("Making request %d/%d to www.bing.com...", i + 1, total_calls, extra={"sample": "snat.request"})
+                response = session.get('https://www.bing.com', timeout=10)
+                
+                if response.status_code == 200:
+                    successful_calls += 1
+                    logger.info("Request %d successful (Status: %d)", i + 1, response.status_code, extra={"sample": "snat.success"})
+                else:
+                    failed_calls += 1
+                    logger.error("Request %d failed with status: %d", i + 1, response.status_code, extra={"sample": "snat.failure"})
+                
+                # Close the session to release resources
+                session.close()
+                
+            except requests.exceptions.RequestException as e:
+                failed_calls += 1
+                logger.error("Request %d failed with exception: %s", i + 1, e, extra={"sample": "snat.failure"})
+            except Exception as e:
+                failed_calls += 1
+                logger.error("Request %d failed with unexpected error: %s", i + 1, e, extra={"sample": "snat.failure"})
+        
+        result = {
+            "message": f"Completed {total_calls} requests to www.bing.com",
+            "successful_calls": successful_calls,
+            "failed_calls": failed_calls,
+            "total_calls": total_calls
+        }
+        
+        logger.info("SNAT test completed: %s successful, %s failed", successful_calls, failed_calls)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error("SNAT fault endpoint failed: %s", e)
+        return jsonify({"error": "SNAT fault failed", "details": str(e)}), 500
+
+def connection_storm_fault():
+    """Run the asyncio connection-storm mode of the SNAT fault
+
+    Query parameters:
+        url: target URL (default: a local stand-in server)
+        concurrency: concurrent connections (default 100)
+        total: total requests (default 1000)
+        strategy: per-request or pooled (default per-request)
+    """
+    url = request.args.get('url') or None
+    concurrency = request.args.get('concurrency', 100, type=int)
+    total = request.args.get('total', 1000, type=int)
+    strategy = request.args.get('strategy', 'per-request')
+
+    from connection_storm import MAX_CONCURRENCY, MAX_TOTAL, STRATEGIES, is_http_url, run_connection_storm
+    if (not 0 < concurrency <= MAX_CONCURRENCY or not 0 < total <= MAX_TOTAL
+            or strategy not in STRATEGIES or (url and not is_http_url(url))):
+        return jsonify({
+            "error": "Invalid parameters",
+            "details": f"concurrency must be 1-{MAX_CONCURRENCY}, total 1-{MAX_TOTAL}, "
+                       f"strategy one of {', '.join(STRATEGIES)} and url an http or https URL"
+        }), 400
+
+    logger.info("Starting connection storm: %s requests, concurrency %s, strategy %s, target %s...",
+                total, concurrency, strategy, url or 'local stand-in server')
+    stats = run_connection_storm(url=url, concurrency=concurrency, total=total, strategy=strategy)
+
+    logger.info("Connection storm completed: %s connections/s, peak %s ephemeral ports in use",
+                stats['connections_per_second'], stats['peak_ephemeral_ports_in_use'])
+    return jsonify({"message": f"Completed {total} requests to {stats['url']}", **stats})
+
+def high_cpu_fault():
+    """Endpoint that holds CPU cores at a target utilization using worker processes
+
+    Query parameters:
+        utilization: target percentage per core, 1-100 (default 100)
+        workers: number of cores to load, at most the cores available (default: all)
+        duration: seconds to run (default 30)
+    """
+    try:
+        utilization = request.args.get('utilization', 100, type=float)
+        workers = request.args.get('workers', 0, type=int) or None
+        duration = request.args.get('duration', 30, type=float)
+
+        from cpu_load import available_cores, run_cpu_load
+        max_workers = len(available_cores())
+        if not 1 <= utilization <= 100 or duration <= 0 or (workers is not None and not 0 < workers <= max_workers):
+            return jsonify({
+                "error": "Invalid parameters",
+                "details": f"utilization must be 1-100, duration positive and workers 1-{max_workers}"
+            }), 400
+
+        logger.info("Starting high CPU usage test: %s%% on %s cores for %s seconds...", utilization, workers or 'all', duration)
+
+        stats = run_cpu_load(utilization=utilization, workers=workers, duration=duration)
+
+        result = {
+            "message": f"High CPU test completed with {stats['workers']} worker processes",
+            **stats
+        }
+
+        logger.info("High CPU test completed: %s%% achieved (%s CPU seconds across %s workers)",
+                    stats['achieved_utilization_percent'], stats['cpu_seconds'], stats['workers'])
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error("High CPU fault endpoint failed: %s", e)
+        return jsonify({"error": "High CPU fault failed", "details": str(e)}), 500
+
+def thread_exhaustion_fault():
+    """Endpoint that keeps creating new threads until system limits are reached"""
+    try:
+        logger.info("Starting thread exhaustion test...")
+        
+        import threading
+        import time
+        
+        threads = []
+        thread_count = 0
+        
+        def dummy_thread_work(thread_id):
+            """Simple thread work that keeps the thread alive"""
+            try:
+                logger.info("Thread %d started and waiting...", thread_id, extra={"sample": "threads.started"})
+                # Keep thread alive for a while
+                time.sleep(300)  # Sleep for 5 minutes
+                logger.info("Thread %d completed", thread_id, extra={"sample": "threads.completed"})
+            except Exception as e:
+                logger.error("Thread %s error: %s", thread_id, e)
+        
+        # Keep creating threads until we hit system limits
+        while True:
+            try:
+                thread_count += 1
+                logger.info("Creating thread %d...", thread_count, extra={"sample": "threads.create"})
+                
+                # Create new thread
+                thread = threading.Thread(
+                    target=dummy_thread_work, 
+                    args=(thread_count,),
+                    daemon=True  # Daemon threads will be cleaned up when main process exits
+                )
+                
+                threads.append(thread)
+                thread.start()
+                
+                # Brief pause between thread creation
+                time.sleep(0.01)
+                
+                # Safety check - if we've created a lot of threads, let's check if we should stop
+                if thread_count % 100 == 0:
+                    logger.info("Created %s threads so far...", thread_count)
+                    
+                # Optional: Add a reasonable upper limit to prevent complete system crash
+                if thread_count >= 5000:
+                    logger.warning("Reached safety limit of %s threads", thread_count)
+                    break
+                    
+            except OSError as e:
+                # This is expected when we hit system thread limits
+                logger.error("Thread creation failed after %s threads: %s", thread_count, e)
+                break
+            except Exception as e:
+                # Any other unexpected error
+                logger.error("Unexpected error creating thread %s: %s", thread_count, e)
+                break
+        
+        # Give threads a moment to start
+        time.sleep(1)
+        
+        # Count active threads
+        active_threads = threading.active_count()
+        
+        result = {
+            "message": f"Thread exhaustion test completed after creating {thread_count} threads",
+            "threads_created": thread_count,
+            "active_threads": active_threads,
+            "status": "Thread limit reached" if thread_count >= 5000 else "System limit encountered"
+        }
+        
+        logger.info("Thread exhaustion test completed: %s threads created, %s active", thread_count, active_threads)
+        
+        # Return 500 to indicate the fault condition was reached
+        return jsonify(result), 500
+    
+    except Exception as e:
+        logger.error("Thread exhaustion fault endpoint failed: %s", e)
+        return jsonify({"error": "Thread exhaustion fault failed", "details": str(e)}), 500
+
+def bad_write_fault():
+    """Endpoint that attempts to write to a restricted/non-existent file path and exits the program"""
+    try:
+        logger.info("Starting bad write test...")
+        
+        file_path = "/proc/badwrite"
+        content = "ABC"
+        
+        logger.info("Attempting to write '%s' to %s...", content, file_path)
+        
+        # Attempt to write to the restricted/non-existent path
+        try:
+            with open(file_path, 'w') as f:
+                f.write(content)
+            
+            # If we somehow succeed (shouldn't happen), still exit
+            logger.warning("Unexpected success writing to %s - exiting anyway", file_path)
+            sys.exit(0)
+            
+        except PermissionError as e:
+            logger.error("Permission denied writing to %s: %s", file_path, e)
+            logger.error("Exiting program due to permission error")
+            sys.exit(1)
+            
+        except FileNotFoundError as e:
+            logger.error("File not found: %s: %s", file_path, e)
+            logger.error("Exiting program due to file not found error")
+            sys.exit(1)
+            
+        except OSError as e:
+            logger.error("OS error writing to %s: %s", file_path, e)
+            logger.error("Exiting program due to OS error")
+            sys.exit(1)
+            
+        except IOError as e:
+            logger.error("IO error writing to %s: %s", file_path, e)
+            logger.error("Exiting program due to IO error")
+            sys.exit(1)
+    
+    except Exception as e:
+        logger.error("Bad write fault endpoint failed: %s", e)
+        logger.error("Exiting program due to unexpected error")
+        sys.exit(1)
+
+def bad_tls_fault():
+    """Endpoint that attempts to make HTTPS connection with deprecated TLS 1.0"""
+    try:
+        logger.info("Starting bad TLS test...")
+        
+        # Get the target URL from environment variable
+        webapi_url = os.getenv('WEBAPI_URL')
+        if not webapi_url:
+            logger.error("WEBAPI_URL environment variable is not defined!")
+            result = {
+                "error": "Configuration error",
+                "details": "WEBAPI_URL environment variable is not set",
+                "error_type": "ConfigurationError"
+            }
+            return jsonify(result), 500
+        
+        logger.info("Attempting HTTPS connection with TLS 1.0 to: %s", webapi_url)
+        
+        # Import required modules for TLS configuration
+        try:
+            import ssl
+            import urllib3
+            from urllib3.util.ssl_ import create_urllib3_context
+            from requests.adapters import HTTPAdapter
+        except ImportError as import_error:
+            logger.error("Missing required dependencies for TLS configuration: %s", import_error)
+            result = {
+                "error": "Missing dependencies",
+                "details": f"Required modules not available: {str(import_error)}",
+                "error_type": "ImportError"
+            }
+            return jsonify(result), 500
+        
+        try:
+            # Create a custom SSL context that forces TLS 1.0
+            context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)  # Force TLS 1.0 only
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            
+            # Disable urllib3 warnings for unverified HTTPS requests
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            
+            # Create a custom adapter for requests that uses TLS 1.0
+            class TLS10Adapter(HTTPAdapter):
+                def init_poolmanager(self, *args, **kwargs):
+                    ctx = create_urllib3_context()
+                    ctx.set_ciphers('DEFAULT@SECLEVEL=1')
+                    ctx.minimum_version = ssl.TLSVersion.TLSv1
+                    ctx.maximum_version = ssl.TLSVersion.TLSv1
+                    kwargs['ssl_context'] = ctx
+                    return super().init_poolmanager(*args, **kwargs)
+            
+            # Create a session with the TLS 1.0 adapter
+            session = requests.Session()
+            session.mount('https://', TLS10Adapter())
+            
+            logger.info("Making HTTPS request with TLS 1.0...")
+            response = session.get(webapi_url, timeout=30, verify=False)
+            
+            # If we somehow succeed (very unlikely with modern servers)
+            result = {
+                "message": f"Unexpected success with TLS 1.0 connection to {webapi_url}",
+                "url": webapi_url,
+                "status_code": response.status_code,
+                "tls_version": "1.0",
+                "response_size": len(response.content)
+            }
+            logger.warning("Unexpected TLS 1.0 success: %s", response.status_code)
+            return jsonify(result)
+            
+        except ssl.SSLError as e:
+            logger.error("SSL error with TLS 1.0 connection: %s", e)
+            result = {
+                "error": "SSL/TLS error",
+                "url": webapi_url,
+                "tls_version": "1.0",
+                "details": str(e),
+                "error_type": "SSLError"
+            }
+            return jsonify(result), 500
+            
+        except requests.exceptions.SSLError as e:
+            logger.error("Requests SSL error with TLS 1.0: %s", e)
+            result = {
+                "error": "HTTPS connection failed",
+                "url": webapi_url,
+                "tls_version": "1.0", 
+                "details": str(e),
+                "error_type": "RequestsSSLError"
+            }
+            return jsonify(result), 500
+            
+        except requests.exceptions.ConnectionError as e:
+            logger.error("Connection error with TLS 1.0: %s", e)
+            result = {
+                "error": "Connection failed",
+                "url": webapi_url,
+                "tls_version": "1.0",
+                "details": str(e),
+                "error_type": "ConnectionError"
+            }
+            return jsonify(result), 500
+            
+        except requests.exceptions.Timeout as e:
+            logger.error("Timeout error with TLS 1.0: %s", e)
+            result = {
+                "error": "Request timeout",
+                "url": webapi_url,
+                "tls_version": "1.0",
+                "details": str(e),
+                "error_type": "TimeoutError"
+            }
+            return jsonify(result), 500
+            
+        except Exception as e:
+            logger.error("Unexpected error during TLS 1.0 connection: %s", e)
+            result = {
+                "error": "Unexpected connection error",
+                "url": webapi_url,
+                "tls_version": "1.0",
+                "details": str(e),
+                "error_type": type(e).__name__
+            }
+            return jsonify(result), 500
+    
+    except Exception as e:
+        logger.error("Bad TLS fault endpoint failed: %s", e)
+        return jsonify({"error": "Bad TLS fault failed", "details": str(e)}), 500
+
+def slow_call_fault():
+    """Endpoint that makes HTTP connection to a slow API endpoint"""
+    try:
+        logger.info("Starting slow call test...")
+        
+        # Get the target URL from environment variable
+        webapi_url = os.getenv('WEBAPI_URL')
+        if not webapi_url:
+            logger.error("WEBAPI_URL environment variable is not defined!")
+            result = {
+                "error": "Configuration error",
+                "details": "WEBAPI_URL environment variable is not set",
+                "error_type": "ConfigurationError"
+            }
+            return jsonify(result), 500
+        
+        # Construct the slow API endpoint URL
+        slow_api_url = f"{webapi_url.rstrip('/')}/slowapi"
+        logger.info("Making HTTP request to slow endpoint: %s", slow_api_url)
+        
+        try:
+            import time
+            start_time = time.time()
+            
+            # Make request with extended timeout for slow responses
+            logger.info("Sending request to slow API endpoint...")
+            response = requests.get(slow_api_url, timeout=120)  # 2 minute timeout
+            
+            end_time = time.time()
+            response_time = end_time - start_time
+            
+            logger.info("Request completed in %.2f seconds", response_time)
+            
+            result = {
+                "message": f"Slow call completed to {slow_api_url}",
+                "url": slow_api_url,
+                "status_code": response.status_code,
+                "response_time_seconds": round(response_time, 2),
+                "response_size": len(response.content),
+                "content_type": response.headers.get('content-type', 'unknown')
+            }
+            
+            # Log response details
+            logger.info("Response: %s, Time: %.2fs, Size: %s bytes",
+                        response.status_code, response_time, len(response.content))
+            
+            # Return 500 if the response indicates an error or if it took too long
+            if response.status_code >= 400:
+                result["error"] = f"HTTP error {response.status_code}"
+                return jsonify(result), 500
+            elif response_time > 60:  # Consider calls over 1 minute as problematic
+                result["error"] = "Response time exceeded acceptable threshold"
+                return jsonify(result), 500
+            else:
+                return jsonify(result)
+            
+        except requests.exceptions.Timeout as e:
+            logger.error("Request timeout to slow API: %s", e)
+            result = {
+                "error": "Request timeout",
+                "url": slow_api_url,
+                "timeout_seconds": 120,
+                "details": str(e),
+                "error_type": "TimeoutError"
+            }
+            return jsonify(result), 500
+            
+        except requests.exceptions.ConnectionError as e:
+            logger.error("Connection error to slow API: %s", e)
+            result = {
+                "error": "Connection failed",
+                "url": slow_api_url,
+                "details": str(e),
+                "error_type": "ConnectionError"
+            }
+            return jsonify(result), 500
+            
+        except requests.exceptions.HTTPError as e:
+            logger.error("HTTP error from slow API: %s", e)
+            result = {
+                "error": "HTTP error",
+                "url": slow_api_url,
+                "details": str(e),
+                "error_type": "HTTPError"
+            }
+            return jsonify(result), 500
+            
+        except requests.exceptions.RequestException as e:
+            logger.error("Request exception to slow API: %s", e)
+            result = {
+                "error": "Request failed",
+                "url": slow_api_url,
+                "details": str(e),
+                "error_type": "RequestException"
+            }
+            return jsonify(result), 500
+            
+        except Exception as e:
+            logger.error("Unexpected error during slow API call: %s", e)
+            result = {
+                "error": "Unexpected error",
+                "url": slow_api_url,
+                "details": str(e),
+                "error_type": type(e).__name__
+            }
+            return jsonify(result), 500
+    
+    except Exception as e:
+        logger.error("Slow call fault endpoint failed: %s", e)
+        return jsonify({"error": "Slow call fault failed", "details": str(e)}), 500
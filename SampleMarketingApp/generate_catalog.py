@@ -0,0 +1,287 @@
+"""
+Deterministic synthetic catalog generator for scale testing
+
+Produces realistic Item rows from a seed: names built from brand, adjective
+and product words, descriptions of varying length, a skewed (Zipf-like)
+category distribution and per-category price ranges. The same seed and
+row count always produce the same catalog.
+
+Rows are streamed in batches so memory stays bounded at any size, and can
+be written to SQLite, PostgreSQL (via COPY) or a JSON Lines snapshot file.
+
+Usage:
+    python generate_catalog.py --rows 1000000 --sqlite marketing_app.db --truncate
+    python generate_catalog.py --rows 1000000 --database-url postgresql://... --truncate
+    python generate_catalog.py --rows 1000000 --snapshot catalog.jsonl.gz
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import math
+import random
+import sqlite3
+import time
+
+# category -> (min price, max price, product words, images), most common first
+CATEGORIES = {
+    'Electronics': (19.99, 1499.99, ['Smart Hub', 'Webcam', 'Charger', 'Power Bank', 'Smartwatch'],
+                    ['smart-hub.jpg', 'webcam.jpg', 'wireless-charger.jpg', 'smartwatch.jpg']),
+    'Accessories': (4.99, 199.99, ['Laptop Stand', 'Phone Stand', 'Tablet Case', 'USB-C Hub', 'Cable Kit'],
+                    ['laptop-stand.jpg', 'phone-stand.jpg', 'tablet-case.jpg', 'usb-hub.jpg']),
+    'Audio': (14.99, 899.99, ['Headphones', 'Earbuds', 'Speaker', 'Soundbar', 'Microphone'],
+              ['headphones.jpg', 'speaker.jpg']),
+    'Gaming': (9.99, 699.99, ['Gaming Mouse', 'Mechanical Keyboard', 'Controller', 'Headset', 'Mouse Pad'],
+               ['gaming-mouse.jpg', 'keyboard.jpg']),
+    'Computing': (29.99, 2999.99, ['Monitor', 'Docking Station', 'External SSD', 'Router', 'Laptop Sleeve'],
+                  ['usb-hub.jpg', 'laptop-stand.jpg']),
+    'Wearables': (24.99, 799.99, ['Fitness Band', 'Smart Ring', 'Sport Watch', 'Smart Glasses'],
+                  ['smartwatch.jpg']),
+    'Smart Home': (9.99, 499.99, ['Smart Plug', 'Smart Bulb', 'Video Doorbell', 'Thermostat', 'Hub'],
+                   ['smart-hub.jpg']),
+    'Cameras': (49.99, 3499.99, ['Action Camera', 'Mirrorless Camera', 'Tripod', 'Ring Light'],
+                ['webcam.jpg']),
+    'Mobile': (4.99, 299.99, ['Phone Case', 'Screen Protector', 'Car Mount', 'Wireless Charger'],
+               ['phone-stand.jpg', 'wireless-charger.jpg']),
+    'Office': (2.99, 499.99, ['Desk Lamp', 'Ergonomic Chair Cushion', 'Document Scanner', 'Label Printer'],
+               ['laptop-stand.jpg']),
+}
+
+BRANDS = ['Apex', 'Lumen', 'Nimbus', 'Vertex', 'Orbit', 'Pulse', 'Zenith', 'Aero', 'Nova', 'Helix',
+          'Quanta', 'Stratus', 'Kinetic', 'Polar', 'Ember', 'Cobalt', 'Summit', 'Echo', 'Flux', 'Atlas']
+ADJECTIVES = ['Premium', 'Compact', 'Wireless', 'Portable', 'Ultra', 'Pro', 'Ergonomic', 'Smart', 'Slim',
+              'Rugged', 'Advanced', 'Classic', 'Essential', 'Deluxe', 'Lightweight', 'Adjustable']
+SENTENCES = [
+    "Designed for everyday use with a durable, premium finish.",
+    "Sets up in minutes and works with all major platforms.",
+    "Long battery life keeps you going from morning to night.",
+    "Backed by a two-year warranty and responsive support.",
+    "Precision engineering delivers consistent, reliable performance.",
+    "A compact footprint that fits neatly on any desk.",
+    "Made from recycled materials without compromising on quality.",
+    "Customizable settings let you tailor it to your workflow.",
+    "Fast charging gets you back to full power in no time.",
+    "Low-latency connectivity for smooth, responsive control.",
+    "Water- and dust-resistant construction for life on the go.",
+    "Includes everything you need to get started out of the box.",
+    "Intuitive controls make it easy for the whole family to use.",
+    "Firmware updates add new features over time.",
+    "Carefully tuned for clear sound and rich detail.",
+    "An adjustable design that adapts to the way you work.",
+]
+
+COLUMNS = ('id', 'name', 'description', 'price', 'category', 'image_url')
+DEFAULT_SKEW = 1.1
+
+
+class CatalogGenerator:
+    """Seeded, streaming generator of synthetic Item rows"""
+
+    def __init__(self, seed=42, skew=DEFAULT_SKEW):
+        self.rng = random.Random(seed)
+        names = list(CATEGORIES)
+        # Zipf-like weights: the k-th category is 1/k^skew as common as the first
+        weights = [1 / (rank ** skew) for rank in range(1, len(names) + 1)]
+        total = sum(weights)
+        self.categories = names
+        self.cum_weights = list(itertools.accumulate(w / total for w in weights))
+
+    def rows(self, count, start_id=1):
+        """Yield (id, name, description, price, category, image_url) tuples"""
+        rng = self.rng
+        random_ = rng.random
+        choice = rng.choice
+        choices = rng.choices
+        categories = self.categories
+        cum_weights = self.cum_weights
+        specs = {name: CATEGORIES[name] for name in categories}
+
+        for item_id in range(start_id, start_id + count):
+            category = choices(categories, cum_weights=cum_weights)[0]
+            low, high, products, images = specs[category]
+            name = f"{choice(BRANDS)} {choice(ADJECTIVES)} {choice(products)}"
+
+            # Mostly short descriptions with a long tail of longer ones
+            sentences = 1 + int(-math.log(1.0 - random_()) * 1.5)
+            description = " ".join(choice(SENTENCES) for _ in range(min(sentences, 8)))
+
+            # Log-uniform prices so cheap items outnumber expensive ones
+            price = round(math.exp(math.log(low) + random_() * (math.log(high) - math.log(low))), 2)
+            image_url = f"/static/images/{choice(images)}"
+            yield item_id, name, description, price, category, image_url
+
+
+def batched(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# The product listing indexes from models.Item, built after the bulk load
+SQLITE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_items_name_id ON items (name, id)",
+    "CREATE INDEX IF NOT EXISTS ix_items_price_id ON items (price, id)",
+    "CREATE INDEX IF NOT EXISTS ix_items_category_name_id ON items (category, name, id)",
+    "CREATE INDEX IF NOT EXISTS ix_items_category_price_id ON items (category, price, id)",
+)
+
+
+def write_sqlite(path, rows, batch_size, truncate):
+    """Bulk-insert rows into an SQLite database with sqlite3 directly"""
+    from models import SQLITE_CATALOG_META, SQLITE_CATALOG_META_BUMP, SQLITE_CATALOG_TRIGGERS
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(100) NOT NULL, description TEXT, "
+            "price NUMERIC(10, 2) NOT NULL, category VARCHAR(50), image_url VARCHAR(255))"
+        )
+        # The build is one transaction; a crash leaves the old catalog in place
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("BEGIN")
+        # The catalog_meta triggers would run an UPDATE per row; drop them for
+        # the load and bump the version once, in the same transaction
+        for name in SQLITE_CATALOG_TRIGGERS:
+            connection.execute(f"DROP TRIGGER IF EXISTS {name}")
+        if truncate:
+            connection.execute("DELETE FROM items")
+        written = 0
+        for batch in batched(rows, batch_size):
+            connection.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?)", batch)
+            written += len(batch)
+        for statement in SQLITE_CATALOG_META:
+            connection.execute(statement)
+        connection.execute(SQLITE_CATALOG_META_BUMP)
+        connection.commit()
+        for statement in SQLITE_INDEXES:
+            connection.execute(statement)
+        return written
+    finally:
+        connection.close()
+
+
+class _CopyStream:
+    """File-like object feeding generated rows to PostgreSQL COPY as text"""
+
+    def __init__(self, rows):
+        self.lines = ("\t".join(str(value).replace("\\", "\\\\").replace("\t", " ").replace("\n", " ")
+                                for value in row) + "\n" for row in rows)
+        self.pending = b""
+        self.count = 0
+
+    def read(self, size=-1):
+        chunks = [self.pending]
+        have = len(self.pending)
+        while size < 0 or have < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            data = line.encode('utf-8')
+            chunks.append(data)
+            have += len(data)
+            self.count += 1
+        data = b"".join(chunks)
+        if size < 0:
+            self.pending = b""
+            return data
+        self.pending = data[size:]
+        return data[:size]
+
+
+def write_database(url, rows, batch_size, truncate):
+    """Write rows to any SQLAlchemy database, using COPY on PostgreSQL"""
+    from sqlalchemy import create_engine, insert, text
+
+    from models import Item, create_catalog_meta, create_indexes
+
+    engine = create_engine(url)
+    Item.__table__.create(engine, checkfirst=True)
+    create_catalog_meta(engine)
+    with engine.begin() as connection:
+        if truncate:
+            connection.execute(text("DELETE FROM items"))
+        if engine.dialect.name == 'postgresql':
+            stream = _CopyStream(rows)
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(f"COPY items ({', '.join(COLUMNS)}) FROM STDIN", stream, size=1 << 20)
+            # Explicit ids bypass the serial sequence, so move it past them
+            connection.execute(text(
+                "SELECT setval(pg_get_serial_sequence('items', 'id'), COALESCE(MAX(id), 1)) FROM items"))
+            written = stream.count
+        else:
+            written = 0
+            for batch in batched(rows, batch_size):
+                connection.execute(insert(Item.__table__), [dict(zip(COLUMNS, row)) for row in batch])
+                written += len(batch)
+    # Tables created before the listing indexes existed get them here
+    create_indexes(engine)
+    return written
+
+
+def write_snapshot(path, rows):
+    """Write rows as JSON Lines, gzip-compressed when the path ends in .gz"""
+    opener = gzip.open if path.endswith('.gz') else open
+    written = 0
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(COLUMNS, row)), separators=(',', ':')))
+            f.write("\n")
+            written += 1
+    return written
+
+
+def next_id(args):
+    """Return the first id to generate, continuing after existing rows unless truncating"""
+    if args.start_id or args.truncate or args.snapshot:
+        return args.start_id or 1
+    if args.sqlite:
+        connection = sqlite3.connect(args.sqlite)
+        try:
+            return (connection.execute("SELECT MAX(id) FROM items").fetchone()[0] or 0) + 1
+        except sqlite3.OperationalError:
+            return 1
+        finally:
+            connection.close()
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import ProgrammingError, OperationalError
+    try:
+        with create_engine(args.database_url).connect() as connection:
+            return (connection.execute(text("SELECT MAX(id) FROM items")).scalar() or 0) + 1
+    except (ProgrammingError, OperationalError):
+        return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--sqlite', metavar='PATH', help="SQLite database file to write to")
+    target.add_argument('--database-url', help="SQLAlchemy URL (PostgreSQL uses COPY)")
+    target.add_argument('--snapshot', metavar='PATH', help="JSON Lines file (.gz to compress)")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skew', type=float, default=DEFAULT_SKEW, help="category distribution skew (0 = uniform)")
+    parser.add_argument('--start-id', type=int, default=0, help="first item id (default: after existing rows)")
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--truncate', action='store_true', help="delete existing items first")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = CatalogGenerator(args.seed, args.skew).rows(args.rows, start_id=next_id(args))
+    if args.sqlite:
+        written = write_sqlite(args.sqlite, rows, args.batch_size, args.truncate)
+    elif args.database_url:
+        written = write_database(args.database_url, rows, args.batch_size, args.truncate)
+    else:
+        written = write_snapshot(args.snapshot, rows)
+    elapsed = time.perf_counter() - start
+
+    print(f"Wrote {written} items in {elapsed:.1f} seconds ({written / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Gunicorn configuration for SampleMarketingApp
+
+Every setting can be overridden through the environment variables named
+below, so the same file serves App Service, containers and local runs.
+"""
+
+import multiprocessing
+import os
+
+# Bind to the port the platform hands us (App Service sets PORT)
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Worker processes: the usual (2 x cores) + 1 unless WEB_CONCURRENCY is set
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# gthread lets each worker overlap the blocking DB and outbound HTTP calls;
+# set GUNICORN_WORKER_CLASS=sync for one request per worker process
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Import the app once in the master so workers fork with it already loaded
+# (and the 5 second startup wait is paid once, not per worker)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+# Recycle workers periodically to cap slow leaks; jitter keeps them from
+# all restarting at the same moment
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+# The slow call fault waits up to 120 seconds on the downstream API
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '180'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master process
+
+    close=False leaves the parent's sockets alone and only makes this
+    worker's pool start empty, so no connection is shared across processes.
+    """
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
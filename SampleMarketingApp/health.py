@@ -0,0 +1,126 @@
+"""
+Liveness and readiness endpoints for probes and platform health checks
+
+/healthz answers from memory without any I/O: if the worker can serve it,
+the process is alive. /readyz reports dependency checks that a background
+thread runs every HEALTH_CHECK_INTERVAL seconds (default 10):
+
+    database  SELECT 1 through the app's engine
+    webapi    an HTTP GET to WEBAPI_URL (skipped when it is not set)
+
+Probes only read the cached results, so they never add database load.
+Readiness fails (503) when a check listed in READY_REQUIRED (default
+"database") is failing, or when the results are older than three
+intervals because the checker has stalled.
+"""
+
+import logging
+import os
+import time
+
+from flask import current_app, jsonify
+from sqlalchemy import text
+
+from models import db
+from per_process import PerProcess, start_daemon
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyChecker:
+    """Runs dependency checks on an interval and caches the results"""
+
+    def __init__(self, app, interval=10.0, timeout=2.0, required=('database',)):
+        self.app = app
+        self.interval = interval
+        self.timeout = timeout
+        self.required = set(required)
+        self.results = {}
+        self.checked_at = None
+        self._thread = PerProcess(lambda: start_daemon(self._run, 'dependency-checks'))
+
+    def start(self):
+        self._thread()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_checks()
+            except Exception as e:
+                logger.error("Dependency checks failed to run: %s", e)
+            time.sleep(self.interval)
+
+    def _timed(self, check):
+        start = time.perf_counter()
+        try:
+            details = check()
+            result = {"ok": True}
+            if details:
+                result.update(details)
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    def check_database(self):
+        with self.app.app_context():
+            with db.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+    def check_webapi(self):
+        import requests
+        response = requests.get(os.environ['WEBAPI_URL'], timeout=self.timeout)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return {"status_code": response.status_code}
+
+    def run_checks(self):
+        results = {"database": self._timed(self.check_database)}
+        if os.getenv('WEBAPI_URL'):
+            results["webapi"] = self._timed(self.check_webapi)
+        # Replace the whole dict so readers never see a partial update
+        self.results = results
+        self.checked_at = time.time()
+
+    def status(self):
+        results, checked_at = self.results, self.checked_at
+        if checked_at is None:
+            return False, {"status": "starting", "checks": {}}
+        age = time.time() - checked_at
+        stale = age > 3 * self.interval
+        failing = sorted(name for name in self.required if not results.get(name, {}).get("ok"))
+        ready = not stale and not failing
+        return ready, {
+            "status": "ready" if ready else "not ready",
+            "checks": results,
+            "required": sorted(self.required),
+            "failing": failing,
+            "checked_seconds_ago": round(age, 3),
+            "stale": stale
+        }
+
+
+def healthz():
+    """Liveness probe: no I/O, just proof the worker is serving requests"""
+    return jsonify({"status": "ok"})
+
+
+def readyz():
+    """Readiness probe answered from the cached dependency check results"""
+    ready, body = current_app.extensions['dependency_checker'].status()
+    return jsonify(body), 200 if ready else 503
+
+
+def init_health(app):
+    """Register /healthz and /readyz and the background dependency checker"""
+    required = [name.strip() for name in os.getenv('READY_REQUIRED', 'database').split(',') if name.strip()]
+    checker = DependencyChecker(
+        app,
+        interval=float(os.getenv('HEALTH_CHECK_INTERVAL', '10')),
+        timeout=float(os.getenv('HEALTH_CHECK_TIMEOUT', '2')),
+        required=required
+    )
+    app.extensions['dependency_checker'] = checker
+    app.before_request(checker.start)
+    app.add_url_rule('/healthz', 'healthz', healthz)
+    app.add_url_rule('/readyz', 'readyz', readyz)
@@ -0,0 +1,161 @@
+"""
+Non-blocking structured logging for SampleMarketingApp
+
+Records are handed to a background writer thread through a bounded queue
+and written as one JSON object per line. When the queue is full, records
+are dropped (and counted) rather than blocking the request thread. Chatty
+per-iteration messages can be sampled by passing a sample key:
+
+    logger.info("Request %d ok", i, extra={"sample": "snat.request"})
+
+Only the first and then every LOG_SAMPLE_EVERY-th record for each key is
+kept. Settings: LOG_LEVEL (default INFO), LOG_QUEUE_SIZE (default 10000),
+LOG_SAMPLE_EVERY (default 100), LOG_FORMAT=text for plain text lines.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+from per_process import PerProcess
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep the first and every Nth record for each sample key"""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None:
+            return True
+        with self._lock:
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+        if (count - 1) % self.every:
+            return False
+        record.sampled = f"1/{self.every}"
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full
+
+    The queue and writer thread are created on first use in each process.
+    """
+
+    def __init__(self, target, maxsize):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = PerProcess(self._start_listener)
+
+    def _start_listener(self):
+        self.queue = queue.Queue(self.maxsize)
+        listener = logging.handlers.QueueListener(self.queue, self.target)
+        listener.start()
+        return listener
+
+    def prepare(self, record):
+        # Resolve the message and traceback now so the writer never touches
+        # request-local objects, but leave JSON formatting to the writer
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._listener()
+        super().emit(record)
+
+    def stop(self):
+        if self._listener.started():
+            self._listener.value.stop()
+            self._listener.reset()
+
+
+_handler = None
+
+
+def setup_logging(stream=None):
+    """Route the root logger through a bounded queue to a background writer
+
+    Safe to call more than once; only the first call configures logging.
+    """
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    target = logging.StreamHandler(stream or sys.stdout)
+    if os.getenv('LOG_FORMAT', 'json') == 'text':
+        target.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        target.setFormatter(JsonFormatter())
+
+    handler = DroppingQueueHandler(target, int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    handler.addFilter(SamplingFilter(int(os.getenv('LOG_SAMPLE_EVERY', '100'))))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    root.addHandler(handler)
+
+    # Flush what is still queued when the process exits normally
+    atexit.register(handler.stop)
+
+    _handler = handler
+    return handler
+
+
+def logging_stats():
+    """Return queue depth and drop counters for the logging pipeline"""
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queue_size": _handler.queue.qsize(),
+        "queue_capacity": _handler.maxsize,
+        "dropped": _handler.dropped
+    }
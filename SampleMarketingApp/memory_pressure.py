@@ -0,0 +1,90 @@
+"""
+Controlled memory-pressure generator for the high memory fault
+
+Memory is grown in anonymous mmap chunks at a fixed ramp rate until the
+process RSS reaches the target. Each chunk is faulted in by writing one
+byte per page through a strided slice assignment, which runs in C rather
+than looping in the interpreter. Unmapping the chunks hands the pages
+straight back to the kernel when the hold period ends.
+"""
+
+import mmap
+import time
+
+from procfs import read_rss_mb, read_status
+
+PAGE_SIZE = mmap.PAGESIZE
+MB = 1024 * 1024
+
+
+def _touch_pages(region):
+    """Fault in every page of an mmap region"""
+    pages = (len(region) + PAGE_SIZE - 1) // PAGE_SIZE
+    region[::PAGE_SIZE] = b'\x01' * pages
+
+
+def run_memory_pressure(target_mb, ramp_mb_per_s=256, hold_seconds=30, chunk_mb=16):
+    """Grow RSS to target_mb at ramp_mb_per_s, hold it, then release it"""
+    if target_mb <= 0 or ramp_mb_per_s <= 0 or chunk_mb <= 0 or hold_seconds < 0:
+        raise ValueError("target_mb, ramp_mb_per_s and chunk_mb must be positive and hold_seconds non-negative")
+
+    rss_before = read_rss_mb()
+    hwm_before_kb = read_status().get('VmHWM')
+    chunk_size = int(chunk_mb * MB)
+
+    regions = []
+    allocated = 0
+    stop_reason = "target reached"
+    ramp_start = time.monotonic()
+
+    try:
+        while True:
+            rss = read_rss_mb()
+            if rss is None:
+                # Without /proc, fall back to counting what we mapped ourselves
+                rss = (rss_before or 0) + allocated / MB
+            remaining_mb = target_mb - rss
+            if remaining_mb <= 0:
+                break
+
+            size = min(chunk_size, max(PAGE_SIZE, int(remaining_mb * MB)))
+            try:
+                region = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+                _touch_pages(region)
+            except (OSError, MemoryError) as e:
+                stop_reason = f"allocation failed: {e}"
+                break
+            regions.append(region)
+            allocated += size
+
+            # Pace the ramp: sleep until the schedule catches up with what we allocated
+            ahead = allocated / MB / ramp_mb_per_s - (time.monotonic() - ramp_start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+        ramp_seconds = time.monotonic() - ramp_start
+        rss_peak = read_rss_mb()
+
+        if hold_seconds:
+            time.sleep(hold_seconds)
+    finally:
+        chunks = len(regions)
+        for region in regions:
+            region.close()
+        regions.clear()
+
+    status = read_status()
+    return {
+        "target_mb": target_mb,
+        "ramp_mb_per_s": ramp_mb_per_s,
+        "allocated_mb": round(allocated / MB, 1),
+        "chunks": chunks,
+        "ramp_seconds": round(ramp_seconds, 2),
+        "hold_seconds": hold_seconds,
+        "rss_before_mb": rss_before,
+        "rss_peak_mb": rss_peak,
+        "rss_after_mb": read_rss_mb(),
+        "vm_hwm_before_mb": round(hwm_before_kb / 1024, 1) if hwm_before_kb is not None else None,
+        "vm_hwm_mb": round(status['VmHWM'] / 1024, 1) if 'VmHWM' in status else None,
+        "stop_reason": stop_reason
+    }
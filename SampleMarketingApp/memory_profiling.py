@@ -0,0 +1,284 @@
+"""
+Opt-in allocation profiling with tracemalloc
+
+Enabled with MEMORY_PROFILING=1 and a MEMORY_PROFILING_TOKEN, which every
+call must send as an X-Profiling-Token header. Without both, nothing is
+registered and requests pay nothing. Tracing itself starts at boot with
+MEMORY_PROFILING_START=1 or later through the API, so an enabled app still
+runs at full speed until someone turns it on.
+
+Endpoints under /api/diagnostics/memory (per worker process):
+
+    POST   /start?frames=1         start tracemalloc
+    POST   /stop                   stop it and discard the traces
+    POST   /snapshots/<name>       take a named snapshot
+    GET    /snapshots              list snapshots
+    GET    /snapshots/<name>       top allocations, ?group=lineno|filename|traceback&top=20
+    DELETE /snapshots/<name>       drop a snapshot
+    GET    /diff?from=a&to=b       top differences between two snapshots
+    GET    /routes                 per-route peak allocation of sampled requests
+
+While tracing, MEMORY_PROFILING_SAMPLE_RATE (default 0.1) of requests are
+sampled for their peak allocation. The peak is process-wide, so only one
+request is sampled at a time and concurrent unsampled requests still add
+to it; the numbers are exact with a single worker thread.
+"""
+
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from flask import Blueprint, current_app, g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+GROUPS = ('lineno', 'filename', 'traceback')
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+class MemoryProfiler:
+    """Named tracemalloc snapshots and per-route peak allocation samples"""
+
+    def __init__(self, sample_rate=0.1, max_snapshots=10):
+        self.sample_rate = sample_rate
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()
+        self.routes = {}
+        self._sample_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def take_snapshot(self, name):
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        with self._lock:
+            self.snapshots.pop(name, None)
+            self.snapshots[name] = (time.time(), snapshot)
+            evicted = []
+            while len(self.snapshots) > self.max_snapshots:
+                evicted.append(self.snapshots.popitem(last=False)[0])
+        return snapshot, evicted
+
+    def begin_sample(self):
+        """Start sampling this request if it is picked and no other sample is running"""
+        if random.random() >= self.sample_rate or not self._sample_lock.acquire(blocking=False):
+            return None
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        return current
+
+    def end_sample(self, route, start):
+        current, peak = tracemalloc.get_traced_memory()
+        self._sample_lock.release()
+        peak_kb = (peak - start) / 1024
+        retained_kb = (current - start) / 1024
+        with self._lock:
+            stats = self.routes.setdefault(route, {"samples": 0, "peak_kb_max": 0.0, "peak_kb_total": 0.0,
+                                                   "retained_kb_total": 0.0})
+            stats["samples"] += 1
+            stats["peak_kb_max"] = max(stats["peak_kb_max"], peak_kb)
+            stats["peak_kb_total"] += peak_kb
+            stats["retained_kb_total"] += retained_kb
+            stats["last_peak_kb"] = peak_kb
+
+    def route_stats(self):
+        with self._lock:
+            return {
+                route: {
+                    "samples": stats["samples"],
+                    "peak_kb_max": round(stats["peak_kb_max"], 1),
+                    "peak_kb_mean": round(stats["peak_kb_total"] / stats["samples"], 1),
+                    "retained_kb_mean": round(stats["retained_kb_total"] / stats["samples"], 1),
+                    "last_peak_kb": round(stats["last_peak_kb"], 1)
+                }
+                for route, stats in sorted(self.routes.items(), key=lambda item: -item[1]["peak_kb_max"])
+            }
+
+
+def _profiler():
+    return current_app.extensions['memory_profiler']
+
+
+def _stat_entry(stat, group, diff=False):
+    frame = stat.traceback[0]
+    entry = {"file": frame.filename}
+    if group != 'filename':
+        entry["line"] = frame.lineno
+    if group == 'traceback':
+        entry["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+    entry["size_kb"] = round(stat.size / 1024, 1)
+    entry["count"] = stat.count
+    if diff:
+        entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+def _group_args():
+    group = request.args.get('group', 'lineno')
+    if group not in GROUPS:
+        return None, None, (jsonify({"error": "Invalid group", "details": f"group must be one of {', '.join(GROUPS)}"}), 400)
+    return group, request.args.get('top', 20, type=int), None
+
+
+def _require_tracing():
+    if not tracemalloc.is_tracing():
+        return jsonify({"error": "Not tracing", "details": "POST /api/diagnostics/memory/start first"}), 409
+    return None
+
+
+memory_bp = Blueprint('memory_profiling', __name__, url_prefix='/api/diagnostics/memory')
+
+
+@memory_bp.before_request
+def check_token():
+    token = current_app.config['MEMORY_PROFILING_TOKEN']
+    # Compare bytes: compare_digest rejects str values with non-ASCII characters.
+    # WSGI decodes header values as latin-1, so this recovers the bytes sent.
+    sent = request.headers.get('X-Profiling-Token', '').encode('latin-1', 'replace')
+    if not hmac.compare_digest(sent, token.encode()):
+        return jsonify({"error": "Forbidden", "details": "A valid X-Profiling-Token header is required"}), 403
+    return None
+
+
+@memory_bp.route('/start', methods=['POST'])
+def start():
+    """Start tracing allocations, keeping ?frames=N frames per traceback"""
+    frames = request.args.get('frames', 1, type=int)
+    if frames < 1:
+        return jsonify({"error": "Invalid frames", "details": "frames must be a positive integer"}), 400
+    if tracemalloc.is_tracing():
+        return jsonify({"tracing": True, "frames": tracemalloc.get_traceback_limit(), "already_running": True})
+    tracemalloc.start(frames)
+    logger.warning("tracemalloc started with %d frame(s) per traceback", frames)
+    return jsonify({"tracing": True, "frames": frames})
+
+
+@memory_bp.route('/stop', methods=['POST'])
+def stop():
+    """Stop tracing; snapshots already taken are kept"""
+    tracemalloc.stop()
+    logger.warning("tracemalloc stopped")
+    return jsonify({"tracing": False})
+
+
+@memory_bp.route('/snapshots', methods=['GET'])
+def list_snapshots():
+    """List the named snapshots of this worker"""
+    current, peak = tracemalloc.get_traced_memory()
+    with _profiler()._lock:
+        snapshots = [{"name": name, "taken_at": taken_at, "traces": len(snapshot.traces),
+                      "size_kb": round(sum(trace.size for trace in snapshot.traces) / 1024, 1)}
+                     for name, (taken_at, snapshot) in _profiler().snapshots.items()]
+    return jsonify({
+        "tracing": tracemalloc.is_tracing(),
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "tracemalloc_overhead_kb": round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+        "snapshots": snapshots
+    })
+
+
+@memory_bp.route('/snapshots/<name>', methods=['POST'])
+def take_snapshot(name):
+    """Take a named snapshot, replacing any snapshot with the same name"""
+    error = _require_tracing()
+    if error:
+        return error
+    snapshot, evicted = _profiler().take_snapshot(name)
+    return jsonify({"name": name, "traces": len(snapshot.traces), "evicted": evicted}), 201
+
+
+@memory_bp.route('/snapshots/<name>', methods=['GET'])
+def show_snapshot(name):
+    """Top allocation sites of a snapshot"""
+    group, top, error = _group_args()
+    if error:
+        return error
+    entry = _profiler().snapshots.get(name)
+    if entry is None:
+        return jsonify({"error": "Unknown snapshot", "details": name}), 404
+    stats = entry[1].statistics(group)
+    return jsonify({
+        "name": name,
+        "total_kb": round(sum(stat.size for stat in stats) / 1024, 1),
+        "top": [_stat_entry(stat, group) for stat in stats[:top]]
+    })
+
+
+@memory_bp.route('/snapshots/<name>', methods=['DELETE'])
+def delete_snapshot(name):
+    profiler = _profiler()
+    with profiler._lock:
+        if profiler.snapshots.pop(name, None) is None:
+            return jsonify({"error": "Unknown snapshot", "details": name}), 404
+    return jsonify({"deleted": name})
+
+
+@memory_bp.route('/diff', methods=['GET'])
+def diff():
+    """Largest changes between snapshots ?from=a&to=b, grouped by file/line"""
+    group, top, error = _group_args()
+    if error:
+        return error
+    snapshots = _profiler().snapshots
+    names = (request.args.get('from'), request.args.get('to'))
+    missing = [name for name in names if name not in snapshots]
+    if missing:
+        return jsonify({"error": "Unknown snapshot", "details": ", ".join(str(name) for name in missing)}), 404
+    stats = snapshots[names[1]][1].compare_to(snapshots[names[0]][1], group)
+    return jsonify({
+        "from": names[0],
+        "to": names[1],
+        "size_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+        "top": [_stat_entry(stat, group, diff=True) for stat in stats[:top]]
+    })
+
+
+@memory_bp.route('/routes', methods=['GET'])
+def routes():
+    """Peak and retained allocation per route for sampled requests"""
+    return jsonify({"sample_rate": _profiler().sample_rate, "routes": _profiler().route_stats()})
+
+
+def _begin_request_sample():
+    if tracemalloc.is_tracing() and request.blueprint != 'memory_profiling':
+        start = current_app.extensions['memory_profiler'].begin_sample()
+        if start is not None:
+            g.memory_sample_start = start
+
+
+def _end_request_sample(exc=None):
+    start = g.pop('memory_sample_start', None)
+    if start is not None:
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        current_app.extensions['memory_profiler'].end_sample(f"{request.method} {rule}", start)
+
+
+def init_memory_profiling(app):
+    """Register the profiling endpoints when MEMORY_PROFILING and a token are set"""
+    if os.getenv('MEMORY_PROFILING', '0') in ('', '0'):
+        return
+    token = os.getenv('MEMORY_PROFILING_TOKEN')
+    if not token:
+        logger.warning("MEMORY_PROFILING is set but MEMORY_PROFILING_TOKEN is not; profiling endpoints disabled")
+        return
+
+    app.config['MEMORY_PROFILING_TOKEN'] = token
+    app.extensions['memory_profiler'] = MemoryProfiler(
+        sample_rate=float(os.getenv('MEMORY_PROFILING_SAMPLE_RATE', '0.1')),
+        max_snapshots=int(os.getenv('MEMORY_PROFILING_MAX_SNAPSHOTS', '10'))
+    )
+    if os.getenv('MEMORY_PROFILING_START', '0') not in ('', '0') and not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv('MEMORY_PROFILING_FRAMES', '1')))
+    app.before_request(_begin_request_sample)
+    app.teardown_request(_end_request_sample)
+    app.register_blueprint(memory_bp)
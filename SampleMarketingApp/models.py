@@ -0,0 +1,105 @@
+"""
+Database models for SampleMarketingApp
+
+db is created unbound here and attached to an app by factory.create_app(),
+so scripts can use the models without importing the web app.
+"""
+
+from flask import g, has_app_context
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """Session that sends queries to g.read_engine when a request sets one
+
+    Flushes always use the normal engine, so writes are never routed.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            read_engine = g.get('read_engine')
+            if read_engine is not None:
+                return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class Item(db.Model):
+    __tablename__ = 'items'
+    # Cover the paged product listing's filter + sort orders (see views.catalog_page)
+    __table_args__ = (
+        db.Index('ix_items_name_id', 'name', 'id'),
+        db.Index('ix_items_price_id', 'price', 'id'),
+        db.Index('ix_items_category_name_id', 'category', 'name', 'id'),
+        db.Index('ix_items_category_price_id', 'category', 'price', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    category = db.Column(db.String(50))
+    image_url = db.Column(db.String(255))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'price': float(self.price),
+            'category': self.category,
+            'image_url': self.image_url
+        }
+
+
+# Item.id is an Integer column, which is 32-bit on PostgreSQL; larger values
+# overflow the driver instead of simply matching nothing
+MAX_ID = 2**31 - 1
+
+
+def is_valid_id(value):
+    """True for an int (not a bool) that fits an Integer id column"""
+    return isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= MAX_ID
+
+
+def create_indexes(bind):
+    """Create any Item indexes missing from an existing items table"""
+    for index in Item.__table__.indexes:
+        index.create(bind, checkfirst=True)
+
+
+# SQLite keeps no per-table change counter, so triggers maintain one in a
+# single catalog_meta row (see catalog_version.py). The epoch is random per
+# database, so a rebuilt file never repeats an earlier version.
+SQLITE_CATALOG_TRIGGERS = {'catalog_meta_insert': 'INSERT', 'catalog_meta_update': 'UPDATE',
+                           'catalog_meta_delete': 'DELETE'}
+SQLITE_CATALOG_META = (
+    "CREATE TABLE IF NOT EXISTS catalog_meta ("
+    "id INTEGER NOT NULL PRIMARY KEY CHECK (id = 1), epoch VARCHAR(16) NOT NULL, version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO catalog_meta (id, epoch, version) VALUES (1, lower(hex(randomblob(8))), 0)",
+) + tuple(
+    f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation} ON items "
+    "BEGIN UPDATE catalog_meta SET version = version + 1 WHERE id = 1; END"
+    for name, operation in SQLITE_CATALOG_TRIGGERS.items()
+)
+SQLITE_CATALOG_META_BUMP = "UPDATE catalog_meta SET version = version + 1 WHERE id = 1"
+
+
+def create_catalog_meta(bind):
+    """On SQLite, create the catalog_meta row and the items triggers that bump it"""
+    if bind.dialect.name != 'sqlite':
+        return
+    with bind.begin() as connection:
+        for statement in SQLITE_CATALOG_META:
+            connection.exec_driver_sql(statement)
+
+
+class CartItem(db.Model):
+    __tablename__ = 'cart_items'
+
+    cart_id = db.Column(db.String(32), primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,64 @@
+"""
+Background work that runs once in each process
+
+Threads do not survive fork(): a thread started while gunicorn's master
+preloads the app is missing from every worker, and a queue or lock it
+shared is left in whatever state the fork caught it in. PerProcess defers
+such work to first use and repeats it in every process that uses it, so
+the same code runs with and without --preload:
+
+    self._thread = PerProcess(lambda: start_daemon(self._run, 'cart-write-behind'))
+    self._thread()    # starts the thread here unless it already runs here
+"""
+
+import os
+import threading
+import weakref
+
+_instances = weakref.WeakSet()
+
+
+class PerProcess:
+    """Calls start() on first use in each process and keeps its result"""
+
+    def __init__(self, start):
+        self._start = start
+        self.value = None
+        self._pid = None
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def __call__(self):
+        """Run start() unless it already ran in this process; return its result"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.value = self._start()
+                    self._pid = os.getpid()
+        return self.value
+
+    def started(self):
+        """True when start() has run in this process"""
+        return self._pid == os.getpid()
+
+    def reset(self):
+        """Forget the result so the next call runs start() again"""
+        with self._lock:
+            self._pid = None
+            self.value = None
+
+
+def start_daemon(target, name):
+    """Start and return a daemon thread running target"""
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def _after_fork():
+    # A lock held by another thread at fork time would never be released here
+    for instance in list(_instances):
+        instance._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,96 @@
+"""
+Small readers for /proc used by the fault generators and diagnostics
+"""
+
+import os
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def read_stat_fields(pid='self'):
+    """Return the fields of /proc/<pid>/stat that follow the command name"""
+    with open(f'/proc/{pid}/stat') as f:
+        data = f.read()
+    # The command name may contain spaces, so split after its closing paren
+    return data[data.rindex(')') + 2:].split()
+
+
+def read_cpu_times(pid='self'):
+    """Return CPU seconds for a process and its waited-for children"""
+    try:
+        fields = read_stat_fields(pid)
+        utime, stime, cutime, cstime = (int(v) / CLOCK_TICKS for v in fields[11:15])
+    except (OSError, ValueError, IndexError):
+        # Fall back to os.times() where /proc is not available
+        times = os.times()
+        utime, stime = times.user, times.system
+        cutime, cstime = times.children_user, times.children_system
+    return {
+        'user': utime,
+        'system': stime,
+        'children_user': cutime,
+        'children_system': cstime
+    }
+
+
+def read_status(pid='self'):
+    """Return /proc/<pid>/status as a dict, with kB values converted to integers"""
+    status = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                value = value.strip()
+                if value.endswith(' kB'):
+                    status[key] = int(value[:-3])
+                else:
+                    status[key] = value
+    except OSError:
+        pass
+    return status
+
+
+def read_rss_mb(pid='self'):
+    """Return the current resident set size in MB, or None if unavailable"""
+    rss_kb = read_status(pid).get('VmRSS')
+    return round(rss_kb / 1024, 1) if rss_kb is not None else None
+
+
+TCP_STATES = {
+    '01': 'ESTABLISHED', '02': 'SYN_SENT', '03': 'SYN_RECV', '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2', '06': 'TIME_WAIT', '07': 'CLOSE', '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK', '0A': 'LISTEN', '0B': 'CLOSING', '0C': 'NEW_SYN_RECV'
+}
+
+
+def read_tcp_sockets(pid='self'):
+    """Yield (local_port, remote_port, state, inode) for IPv4 and IPv6 TCP sockets
+
+    /proc/<pid>/net/tcp lists every socket in the process's network namespace,
+    not just the ones the process owns; match inodes against /proc/<pid>/fd to
+    narrow it down.
+    """
+    for name in ('tcp', 'tcp6'):
+        try:
+            with open(f'/proc/{pid}/net/{name}') as f:
+                next(f, None)  # Skip the header line
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    local_port = int(fields[1].rsplit(':', 1)[1], 16)
+                    remote_port = int(fields[2].rsplit(':', 1)[1], 16)
+                    state = TCP_STATES.get(fields[3], fields[3])
+                    yield local_port, remote_port, state, int(fields[9])
+        except OSError:
+            continue
+
+
+def read_ephemeral_port_range():
+    """Return the (low, high) local port range used for outbound connections"""
+    try:
+        with open('/proc/sys/net/ipv4/ip_local_port_range') as f:
+            low, high = f.read().split()
+        return int(low), int(high)
+    except (OSError, ValueError):
+        return 32768, 60999
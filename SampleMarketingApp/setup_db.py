@@ -3,16 +3,25 @@ Database setup script for SampleMarketingApp
 This script creates the database tables and populates them with sample data.
 """
 
-from app import app, db, Item
+from models import db, Item, create_catalog_meta
+
+def setup_database(app=None):
+    """Create database tables and populate with sample data
+
+    Uses the given app, or builds one without the fault routes so running
+    this script does not import the full web application.
+    """
+    if app is None:
+        from factory import create_app
+        app = create_app(faults=False)
 
-def setup_database():
-    """Create database tables and populate with sample data"""
     with app.app_context():
         # Drop all tables (use with caution in production)
         db.drop_all()
         
         # Create all tables
         db.create_all()
+        create_catalog_meta(db.engine)
         
         # Sample items data
         sample_items = [
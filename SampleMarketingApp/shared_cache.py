@@ -0,0 +1,258 @@
+"""
+Response cache shared by all worker processes on a host
+
+Enabled with SHARED_CACHE=1. Successful GET responses from the catalog
+routes (CACHED_ENDPOINTS) are stored in a memory-mapped file keyed by path,
+sorted query string and catalog version, so every gunicorn worker serves
+what any of them rendered and a freshly forked or restarted worker starts
+warm. A catalog change produces a new version and therefore new keys; old
+entries simply age out.
+
+The file (SHARED_CACHE_PATH, default in /dev/shm) holds a header, a hash
+index of SHARED_CACHE_SLOTS entries (default 4096) and a data ring of
+about SHARED_CACHE_SIZE_MB (default 64). Bodies are appended to the ring
+and the oldest are overwritten when it wraps, so the cache never grows
+past its size. Workers coordinate with flock: lookups take a shared lock,
+stores an exclusive one. A hit copies the body out of the map once, under
+the lock; the ring may be overwritten as soon as the lock is released, so
+responses are not served from the map directly. Responses show X-Cache:
+HIT or MISS.
+"""
+
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+from flask import Response, current_app, g, jsonify, request
+
+from catalog_version import catalog_version
+
+logger = logging.getLogger(__name__)
+
+CACHED_ENDPOINTS = {'get_items', 'get_item', 'products', 'products_page'}
+
+MAGIC = b'SMACHE01'
+# magic, index slots, data size, write position (bytes ever written), stores
+HEADER = struct.Struct('<8sIQQQ')
+WRITE_POS_OFFSET = 20
+# key digest, write position of the record, record length, stored at
+ENTRY = struct.Struct('<16sQId4x')
+# content type length; followed by the content type and the body
+RECORD = struct.Struct('<H')
+PROBES = 8
+
+
+def default_path():
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'sample-marketing-app.cache')
+
+
+class SharedResponseCache:
+    """Size-bounded key -> (content type, body) store in a shared mmap file
+
+    The file is opened lazily in each process, because flock locks taken
+    through a descriptor inherited across fork would not exclude the parent.
+    """
+
+    def __init__(self, path, size, index_slots=4096):
+        self.path = path
+        self.index_slots = index_slots
+        self.index_offset = HEADER.size
+        index_end = self.index_offset + index_slots * ENTRY.size
+        self.data_offset = -(-index_end // mmap.PAGESIZE) * mmap.PAGESIZE
+        self.size = max(size, self.data_offset + mmap.PAGESIZE)
+        self.data_size = self.size - self.data_offset
+        # Larger bodies would evict most of the ring on every store
+        self.max_record = self.data_size // 4
+
+        self.hits = 0
+        self.misses = 0
+        self.too_large = 0
+        self._fd = None
+        self._map = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_open(self):
+        if self._pid == os.getpid():
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != self.size:
+                os.ftruncate(fd, self.size)
+            cache_map = mmap.mmap(fd, self.size)
+            magic, slots, data_size, _, _ = HEADER.unpack_from(cache_map, 0)
+            if (magic, slots, data_size) != (MAGIC, self.index_slots, self.data_size):
+                cache_map[:self.data_offset] = bytes(self.data_offset)
+                HEADER.pack_into(cache_map, 0, MAGIC, self.index_slots, self.data_size, 0, 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd, self._map, self._pid = fd, cache_map, os.getpid()
+
+    def _slot_offsets(self, digest):
+        start = int.from_bytes(digest[:8], 'little')
+        for i in range(PROBES):
+            yield self.index_offset + (start + i) % self.index_slots * ENTRY.size
+
+    def _is_live(self, position, length, write_pos):
+        # A record is intact until the ring has wrapped past its start
+        return length and position + self.data_size >= write_pos
+
+    def get(self, key):
+        """Return (content_type, body) for key, or None"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        with self._lock:
+            self._ensure_open()
+            cache_map = self._map
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                write_pos, = struct.unpack_from('<Q', cache_map, WRITE_POS_OFFSET)
+                for offset in self._slot_offsets(digest):
+                    entry_digest, position, length, _ = ENTRY.unpack_from(cache_map, offset)
+                    if entry_digest == digest and self._is_live(position, length, write_pos):
+                        # Copied while the lock is held: once it is released a
+                        # store from another worker may overwrite this part of
+                        # the ring, so a view into the map could tear mid-response
+                        start = self.data_offset + position % self.data_size
+                        type_length, = RECORD.unpack_from(cache_map, start)
+                        body_start = start + RECORD.size + type_length
+                        content_type = cache_map[start + RECORD.size:body_start].decode()
+                        body = cache_map[body_start:start + length]
+                        break
+                else:
+                    self.misses += 1
+                    return None
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self.hits += 1
+        return content_type, body
+
+    def put(self, key, content_type, body):
+        """Store a body under key; return False if it is too large to cache"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        content_type = content_type.encode()
+        length = RECORD.size + len(content_type) + len(body)
+        if length > self.max_record:
+            with self._lock:
+                self.too_large += 1
+            return False
+
+        with self._lock:
+            self._ensure_open()
+            cache_map = self._map
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                _, _, _, write_pos, stores = HEADER.unpack_from(cache_map, 0)
+                position = write_pos
+                if position % self.data_size + length > self.data_size:
+                    # Records never straddle the end; skip to the start of the ring
+                    position += self.data_size - position % self.data_size
+                start = self.data_offset + position % self.data_size
+                RECORD.pack_into(cache_map, start, len(content_type))
+                body_start = start + RECORD.size + len(content_type)
+                cache_map[start + RECORD.size:body_start] = content_type
+                cache_map[body_start:body_start + len(body)] = body
+                write_pos = position + length
+
+                # Reuse this key's slot, else a free or overwritten one, else the oldest
+                chosen = free = oldest = None
+                for offset in self._slot_offsets(digest):
+                    entry_digest, entry_position, entry_length, _ = ENTRY.unpack_from(cache_map, offset)
+                    if entry_digest == digest:
+                        chosen = offset
+                        break
+                    if free is None and not self._is_live(entry_position, entry_length, write_pos):
+                        free = offset
+                    if oldest is None or entry_position < oldest[1]:
+                        oldest = (offset, entry_position)
+                if chosen is None:
+                    chosen = free if free is not None else oldest[0]
+                ENTRY.pack_into(cache_map, chosen, digest, position, length, time.time())
+                HEADER.pack_into(cache_map, 0, MAGIC, self.index_slots, self.data_size, write_pos, stores + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return True
+
+    def info(self):
+        with self._lock:
+            self._ensure_open()
+            cache_map = self._map
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                _, _, _, write_pos, stores = HEADER.unpack_from(cache_map, 0)
+                entries = 0
+                for slot in range(self.index_slots):
+                    _, position, length, _ = ENTRY.unpack_from(cache_map, self.index_offset + slot * ENTRY.size)
+                    if self._is_live(position, length, write_pos):
+                        entries += 1
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            return {
+                "path": self.path,
+                "size_bytes": self.size,
+                "data_bytes_used": min(write_pos, self.data_size),
+                "bytes_written": write_pos,
+                "entries": entries,
+                "index_slots": self.index_slots,
+                "stores": stores,
+                # Counters below are for this worker process only
+                "hits": self.hits,
+                "misses": self.misses,
+                "too_large": self.too_large
+            }
+
+
+def _cache_key():
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f"{request.path}?{query}#{catalog_version()}"
+
+
+def _serve_cached():
+    if request.method != 'GET' or request.endpoint not in CACHED_ENDPOINTS:
+        return None
+    key = _cache_key()
+    cached = current_app.extensions['shared_cache'].get(key)
+    if cached is None:
+        g.shared_cache_key = key
+        return None
+    content_type, body = cached
+    response = Response(body, content_type=content_type)
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+def _store_response(response):
+    key = g.pop('shared_cache_key', None)
+    if key is not None and response.status_code == 200 and not response.direct_passthrough:
+        current_app.extensions['shared_cache'].put(key, response.content_type, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+    return response
+
+
+def cache_stats():
+    """API endpoint reporting shared cache usage"""
+    return jsonify(current_app.extensions['shared_cache'].info())
+
+
+def init_shared_cache(app):
+    """Serve the catalog routes from the shared cache when SHARED_CACHE is set"""
+    if os.getenv('SHARED_CACHE', '0') in ('', '0'):
+        return
+
+    cache = SharedResponseCache(
+        os.getenv('SHARED_CACHE_PATH') or default_path(),
+        int(float(os.getenv('SHARED_CACHE_SIZE_MB', '64')) * 1024 * 1024),
+        int(os.getenv('SHARED_CACHE_SLOTS', '4096'))
+    )
+    app.extensions['shared_cache'] = cache
+    app.before_request(_serve_cached)
+    app.after_request(_store_response)
+    app.add_url_rule('/api/diagnostics/cache', 'cache_stats', cache_stats)
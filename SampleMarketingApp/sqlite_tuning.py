@@ -0,0 +1,223 @@
+"""
+Tuned SQLite serving mode for edge and development deployments
+
+Enabled with SQLITE_TUNED=1 when DB_BACKEND=sqlite. Every connection gets:
+
+    journal_mode=WAL    readers and the writer no longer block each other
+    synchronous=NORMAL  safe with WAL, skips an fsync per commit
+    mmap_size           SQLITE_MMAP_SIZE bytes (default 256 MiB)
+    cache_size          SQLITE_CACHE_SIZE KiB per connection (default 65536)
+    busy_timeout        SQLITE_BUSY_TIMEOUT ms (default 5000)
+
+Catalog read routes (READ_ENDPOINTS) run their queries on a second engine
+that opens the file through a read-only URI (mode=ro). With
+SQLITE_SNAPSHOT=1 they use a private in-memory copy of the database
+instead, taken with the SQLite backup API and retaken when the catalog
+version changes (checked at most every SQLITE_SNAPSHOT_CHECK seconds,
+default 1). Carts and setup always write through the normal engine.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from urllib.parse import quote
+
+from flask import current_app, g, jsonify, request
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from catalog_version import sqlite_catalog_version, sqlite_file_signature
+from models import db
+
+logger = logging.getLogger(__name__)
+
+READ_ENDPOINTS = {'home', 'get_items', 'get_items_batch', 'get_item', 'products', 'products_page'}
+
+
+def _pragma_listener(pragmas):
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return apply
+
+
+class CatalogSnapshot:
+    """In-memory copy of an SQLite database, reloaded when the catalog changes
+
+    The source's catalog version is read at most every check_interval
+    seconds and the copy is only retaken when it differs, so writes to other
+    tables such as carts never cause a reload. Each
+    process loads its own copy on first use; a copy inherited across fork
+    is replaced, not shared (see per_process.py).
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.current = None  # (engine, catalog version of the copy)
+        self.version = 0
+        self.loaded_at = None
+        self.load_seconds = None
+        self.checked = 0
+        self._holder = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return (engine, catalog version) for the current snapshot, reloading it if stale"""
+        now = time.monotonic()
+        if self._pid == os.getpid() and now - self.checked < self.check_interval:
+            return self.current
+        # Only the first load makes requests wait; later reloads happen in
+        # one thread while the others keep reading the previous snapshot
+        forked = self._pid != os.getpid()
+        if not self._lock.acquire(blocking=forked or self.current is None):
+            return self.current
+        try:
+            if self._pid == os.getpid() and now - self.checked < self.check_interval:
+                return self.current
+            self.checked = now
+            signature = sqlite_file_signature(self.path)
+            # The version is read even when the files look unchanged: a
+            # commit can land in the same mtime tick without changing the size
+            if forked or self._source_version(signature) != self.current[1]:
+                self._load(signature, forked)
+            return self.current
+        finally:
+            self._lock.release()
+
+    def _connect_source(self):
+        return sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True)
+
+    def _source_version(self, signature):
+        source = self._connect_source()
+        try:
+            return sqlite_catalog_version(source, signature)
+        finally:
+            source.close()
+
+    def _load(self, signature, forked):
+        start = time.perf_counter()
+        version = self.version + 1
+        name = f"file:catalog-{os.getpid()}-{id(self)}-{version}?mode=memory&cache=shared"
+
+        # The holder connection keeps the shared in-memory database alive
+        holder = sqlite3.connect(name, uri=True, check_same_thread=False)
+        source = self._connect_source()
+        try:
+            source.backup(holder)
+        finally:
+            source.close()
+        # Read from the copy, which may be newer than signature
+        catalog = sqlite_catalog_version(holder, signature)
+        engine = create_engine(
+            "sqlite://",
+            creator=partial(sqlite3.connect, name, uri=True, check_same_thread=False),
+            poolclass=QueuePool
+        )
+
+        old, old_holder = self.current, self._holder
+        self.current, self._holder = (engine, catalog), holder
+        self.version = version
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+        self._pid = os.getpid()
+
+        # Connections inherited across fork belong to the parent; leave them be
+        if old is not None and not forked:
+            old[0].dispose()
+            old_holder.close()
+        logger.info("Loaded catalog snapshot v%d in %.3f seconds", version, self.load_seconds)
+
+    def info(self):
+        return {
+            "version": self.version,
+            "catalog_version": self.current[1] if self.current else None,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "check_interval_seconds": self.check_interval
+        }
+
+
+class SQLiteServing:
+    """Tuned pragmas, a read-only engine and an optional snapshot for one app"""
+
+    def __init__(self, path, pragmas, snapshot_check=None):
+        self.path = path
+        self.pragmas = pragmas
+        # Journal settings can't be changed on a read-only connection
+        read_pragmas = {name: value for name, value in pragmas.items()
+                        if name not in ('journal_mode', 'synchronous')}
+        self.read_only_engine = create_engine(f"sqlite:///file:{quote(path)}?mode=ro&uri=true")
+        event.listen(self.read_only_engine, 'connect', _pragma_listener(read_pragmas))
+        self.snapshot = CatalogSnapshot(path, snapshot_check) if snapshot_check is not None else None
+
+    def read_engine(self):
+        """Return (engine, catalog version) for reads; the version is None when they are live"""
+        if self.snapshot is not None:
+            return self.snapshot.get()
+        return self.read_only_engine, None
+
+    def info(self):
+        return {
+            "path": self.path,
+            "pragmas": self.pragmas,
+            "read_endpoints": sorted(READ_ENDPOINTS),
+            "snapshot": self.snapshot.info() if self.snapshot is not None else None
+        }
+
+
+def _route_reads():
+    if request.endpoint in READ_ENDPOINTS:
+        g.read_engine, version = current_app.extensions['sqlite_serving'].read_engine()
+        if version is not None:
+            g.catalog_version = version
+
+
+def sqlite_stats():
+    """API endpoint reporting the SQLite serving configuration"""
+    serving = current_app.extensions['sqlite_serving']
+    stats = serving.info()
+    with db.engine.connect() as connection:
+        stats["active"] = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in serving.pragmas}
+    return jsonify(stats)
+
+
+def init_sqlite_tuning(app):
+    """Apply the tuned SQLite mode to an app when SQLITE_TUNED is set"""
+    if os.getenv('SQLITE_TUNED', '0') in ('', '0'):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    path = engine.url.database
+    if not path or path == ':memory:':
+        logger.warning("SQLITE_TUNED needs a database file, not %s; leaving SQLite untuned", engine.url)
+        return
+
+    pragmas = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -int(os.getenv('SQLITE_CACHE_SIZE', '65536')),
+        "busy_timeout": int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+    }
+    event.listen(engine, 'connect', _pragma_listener(pragmas))
+    # Connect once so the file exists and is in WAL mode before any
+    # read-only connection opens it
+    with engine.connect():
+        pass
+
+    snapshot_check = None
+    if os.getenv('SQLITE_SNAPSHOT', '0') not in ('', '0'):
+        snapshot_check = float(os.getenv('SQLITE_SNAPSHOT_CHECK', '1'))
+
+    app.extensions['sqlite_serving'] = SQLiteServing(os.path.abspath(path), pragmas, snapshot_check)
+    app.before_request(_route_reads)
+    app.add_url_rule('/api/diagnostics/sqlite', 'sqlite_stats', sqlite_stats)
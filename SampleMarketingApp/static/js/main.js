@@ -11,6 +11,9 @@ function initializeApp() {
     // Initialize product filtering
     initProductFiltering();
     
+    // Initialize infinite scroll for the product listing
+    initInfiniteScroll();
+    
     // Initialize product modals
     initProductModals();
     
@@ -37,95 +40,81 @@ function initSmoothScrolling() {
     });
 }
 
-// Product filtering functionality
+// Product filtering: the server filters and sorts, so a change reloads the listing
 function initProductFiltering() {
-    const categoryFilter = document.getElementById('categoryFilter');
-    const sortBy = document.getElementById('sortBy');
+    const filters = document.getElementById('productFilters');
+    
+    if (!filters) return;
+    
+    filters.querySelectorAll('select').forEach(select => {
+        select.addEventListener('change', () => filters.submit());
+    });
+}
+
+// Infinite scroll: append the next page of product cards as the end of the grid comes into view
+function initInfiniteScroll() {
+    const sentinel = document.getElementById('productsSentinel');
     const productsGrid = document.getElementById('productsGrid');
-    const emptyState = document.getElementById('emptyState');
     
-    if (!categoryFilter || !sortBy || !productsGrid) return;
+    if (!sentinel || !productsGrid || !('IntersectionObserver' in window)) return;
     
-    categoryFilter.addEventListener('change', filterAndSortProducts);
-    sortBy.addEventListener('change', filterAndSortProducts);
+    let loading = false;
     
-    function filterAndSortProducts() {
-        const selectedCategory = categoryFilter.value;
-        const selectedSort = sortBy.value;
-        const products = Array.from(document.querySelectorAll('.product-item'));
-        
-        // Filter products
-        let visibleProducts = products.filter(product => {
-            const productCategory = product.dataset.category;
-            return selectedCategory === '' || productCategory === selectedCategory;
-        });
+    const observer = new IntersectionObserver((entries) => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNextPage();
+        }
+    }, { rootMargin: '0px 0px 600px 0px' });
+    
+    async function loadNextPage() {
+        const nextUrl = sentinel.dataset.nextUrl;
+        if (loading || !nextUrl) return;
+        loading = true;
         
-        // Sort products
-        visibleProducts.sort((a, b) => {
-            switch (selectedSort) {
-                case 'name':
-                    const nameA = a.querySelector('.product-title').textContent;
-                    const nameB = b.querySelector('.product-title').textContent;
-                    return nameA.localeCompare(nameB);
-                case 'price-low':
-                    return parseFloat(a.dataset.price) - parseFloat(b.dataset.price);
-                case 'price-high':
-                    return parseFloat(b.dataset.price) - parseFloat(a.dataset.price);
-                default:
-                    return 0;
+        try {
+            const response = await fetch(nextUrl);
+            if (!response.ok) throw new Error('Failed to load more products');
+            const template = document.createElement('template');
+            template.innerHTML = await response.text();
+            // The fragment ends with a marker holding the URL of the page after it
+            const marker = template.content.querySelector('.products-next-page');
+            if (marker) marker.remove();
+            template.content.querySelectorAll('.product-card').forEach(card => card.classList.add('fade-in'));
+            productsGrid.appendChild(template.content);
+            
+            if (marker) {
+                sentinel.dataset.nextUrl = marker.dataset.nextUrl;
+            } else {
+                observer.disconnect();
+                sentinel.remove();
             }
-        });
-        
-        // Hide all products
-        products.forEach(product => {
-            product.style.display = 'none';
-        });
-        
-        // Show filtered and sorted products
-        if (visibleProducts.length > 0) {
-            visibleProducts.forEach((product, index) => {
-                product.style.display = 'block';
-                product.style.order = index;
-            });
-            emptyState.style.display = 'none';
-        } else {
-            emptyState.style.display = 'block';
+        } catch (error) {
+            // Leave the Load more link in place as the fallback
+            console.error('Error loading products:', error);
+            observer.disconnect();
+        } finally {
+            loading = false;
         }
-        
-        // Add fade-in animation
-        visibleProducts.forEach((product, index) => {
-            setTimeout(() => {
-                product.classList.add('fade-in');
-            }, index * 100);
-        });
     }
+    
+    observer.observe(sentinel);
 }
 
-// Product modal functionality
+// Product modal functionality (delegated, so cards added by infinite scroll work too)
 function initProductModals() {
-    const productCards = document.querySelectorAll('.product-card');
     const modal = document.getElementById('productModal');
     
     if (!modal) return;
     
-    productCards.forEach(card => {
-        const quickViewBtn = card.querySelector('.product-overlay .btn');
-        if (quickViewBtn) {
-            quickViewBtn.addEventListener('click', function(e) {
-                e.stopPropagation();
-                openProductModal(card);
-            });
-        }
-        
-        // Also allow clicking on the product image to open modal
-        const productImage = card.querySelector('.product-image');
-        if (productImage) {
-            productImage.addEventListener('click', function() {
-                openProductModal(card);
-            });
+    document.addEventListener('click', function(e) {
+        // Quick View and clicks anywhere on the product image open the modal
+        const productCard = e.target.closest('.product-card');
+        if (productCard && e.target.closest('.product-image')) {
+            openProductModal(productCard);
         }
     });
-      function openProductModal(productCard) {
+    
+    function openProductModal(productCard) {
         const title = productCard.querySelector('.product-title').textContent;
         const description = productCard.querySelector('.product-description').textContent;
         const price = productCard.querySelector('.product-price').textContent;
@@ -144,7 +133,7 @@ function initProductModals() {
             modalImage.alt = image.alt;
         }
         
-        const bootstrapModal = new bootstrap.Modal(modal);
+        const bootstrapModal = bootstrap.Modal.getOrCreateInstance(modal);
         bootstrapModal.show();
     }
 }
@@ -170,24 +159,38 @@ function initAddToCart() {
         button.innerHTML = '<span class="loading"></span> Adding...';
         button.disabled = true;
         
-        // Simulate API call
-        setTimeout(() => {
-            // Show success state
-            button.innerHTML = '<i class="fas fa-check me-1"></i>Added!';
-            button.classList.remove('btn-primary');
-            button.classList.add('btn-success');
-            
-            // Show success notification
-            showNotification('Product added to cart successfully!', 'success');
-            
-            // Reset button after 2 seconds
-            setTimeout(() => {
+        fetch('/api/cart/items', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ product_id: Number(productId), quantity: 1 })
+        })
+            .then(response => {
+                if (!response.ok) throw new Error('Failed to add product to cart');
+                return response.json();
+            })
+            .then(() => {
+                // Show success state
+                button.innerHTML = '<i class="fas fa-check me-1"></i>Added!';
+                button.classList.remove('btn-primary');
+                button.classList.add('btn-success');
+                
+                // Show success notification
+                showNotification('Product added to cart successfully!', 'success');
+                
+                // Reset button after 2 seconds
+                setTimeout(() => {
+                    button.innerHTML = originalText;
+                    button.classList.remove('btn-success');
+                    button.classList.add('btn-primary');
+                    button.disabled = false;
+                }, 2000);
+            })
+            .catch(error => {
+                console.error('Error adding to cart:', error);
+                showNotification('Failed to add product to cart. Please try again.', 'danger');
                 button.innerHTML = originalText;
-                button.classList.remove('btn-success');
-                button.classList.add('btn-primary');
                 button.disabled = false;
-            }, 2000);
-        }, 1000);
+            });
     }
 }
 
@@ -253,15 +256,69 @@ async function fetchProducts() {
     }
 }
 
-async function fetchProduct(productId) {
+// Maximum ids per batch request (matches the server's MAX_BATCH_IDS default)
+const MAX_BATCH_IDS = 100;
+
+// Fetch many products in as few requests as possible; resolves to a Map of id -> product
+async function fetchProductsByIds(productIds) {
+    const ids = [...new Set(productIds.map(Number))];
+    const products = new Map();
     try {
-        const response = await fetch(`/api/items/${productId}`);
-        if (!response.ok) throw new Error('Failed to fetch product');
-        return await response.json();
+        for (let i = 0; i < ids.length; i += MAX_BATCH_IDS) {
+            const batch = ids.slice(i, i + MAX_BATCH_IDS);
+            const response = await fetch(`/api/items?ids=${batch.join(',')}`);
+            if (!response.ok) throw new Error('Failed to fetch products');
+            const result = await response.json();
+            result.items.forEach(item => products.set(item.id, item));
+        }
     } catch (error) {
-        console.error('Error fetching product:', error);
+        console.error('Error fetching products:', error);
         showNotification('Failed to load product details. Please try again.', 'danger');
-        return null;
+    }
+    return products;
+}
+
+// Calls to fetchProduct() made in the same tick are coalesced into one batch request
+let pendingProductRequests = null;
+
+function fetchProduct(productId) {
+    if (!pendingProductRequests) {
+        pendingProductRequests = new Map();
+        setTimeout(flushProductRequests, 0);
+    }
+    const id = Number(productId);
+    return new Promise(resolve => {
+        if (!pendingProductRequests.has(id)) {
+            pendingProductRequests.set(id, []);
+        }
+        pendingProductRequests.get(id).push(resolve);
+    });
+}
+
+async function flushProductRequests() {
+    const requests = pendingProductRequests;
+    pendingProductRequests = null;
+    const products = await fetchProductsByIds([...requests.keys()]);
+    requests.forEach((resolvers, id) => {
+        resolvers.forEach(resolve => resolve(products.get(id) || null));
+    });
+}
+
+async function fetchCart() {
+    try {
+        const response = await fetch('/api/cart');
+        if (!response.ok) throw new Error('Failed to fetch cart');
+        const cart = await response.json();
+        // Resolve all cart products with a single batch request
+        const products = await fetchProductsByIds(cart.items.map(entry => entry.product_id));
+        cart.items.forEach(entry => {
+            entry.product = products.get(entry.product_id) || null;
+        });
+        return cart;
+    } catch (error) {
+        console.error('Error fetching cart:', error);
+        showNotification('Failed to load your cart. Please try again.', 'danger');
+        return { items: [], total_quantity: 0 };
     }
 }
 
@@ -290,5 +347,7 @@ window.MarketingApp = {
     showNotification,
     fetchProducts,
     fetchProduct,
+    fetchProductsByIds,
+    fetchCart,
     formatPrice
 };
@@ -2,23 +2,10 @@
 Simple test to create database
 """
 
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+from factory import create_app
+from models import db, Item
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///marketing_app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
-
-class Item(db.Model):
-    __tablename__ = 'items'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text)
-    price = db.Column(db.Numeric(10, 2), nullable=False)
-    category = db.Column(db.String(50))
-    image_url = db.Column(db.String(255))
+app = create_app(backend='sqlite', faults=False)
 
 with app.app_context():
     db.create_all()
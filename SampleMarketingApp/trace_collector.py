@@ -0,0 +1,118 @@
+"""
+Local trace collector stand-in and trace summary tool
+
+serve     accept span batches POSTed by tracing.py (TRACE_EXPORT=http://...)
+          and append them to a JSON Lines file
+summary   split request time per route into database, outbound HTTP and
+          the remaining time spent in the app itself
+
+Usage:
+    python trace_collector.py serve [--port 4318] [--output traces.jsonl]
+    python trace_collector.py summary traces.jsonl [--route /api/faults/slowcall] [--slowest 5]
+"""
+
+import argparse
+import json
+import statistics
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def serve(port, output):
+    lock = threading.Lock()
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                spans = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            with lock, open(output, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(span) + "\n" for span in spans))
+            self.send_response(202)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), CollectorHandler)
+    print(f"Collecting spans on http://127.0.0.1:{port}/ into {output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def load_traces(path):
+    traces = defaultdict(list)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def breakdown(spans):
+    """Yield (route, total, db, http, self) in ms for each server span of a trace"""
+    children = defaultdict(list)
+    for span in spans:
+        children[span["parent_id"]].append(span)
+    for span in spans:
+        if span["kind"] != 'server':
+            continue
+        db_ms = http_ms = 0.0
+        for child in children[span["span_id"]]:
+            if "db.system" in child["attributes"]:
+                db_ms += child["duration_ms"]
+            elif "http.url" in child["attributes"]:
+                http_ms += child["duration_ms"]
+        total = span["duration_ms"]
+        yield span["attributes"].get("http.route", span["name"]), total, db_ms, http_ms, total - db_ms - http_ms, span
+
+
+def summary(path, route=None, slowest=5):
+    rows = defaultdict(list)
+    for spans in load_traces(path).values():
+        for entry in breakdown(spans):
+            if route is None or entry[0] == route:
+                rows[entry[0]].append(entry)
+
+    print(f"{'route':<32}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'db ms':>9}{'http ms':>9}{'app ms':>9}")
+    for name, entries in sorted(rows.items(), key=lambda item: -len(item[1])):
+        totals = sorted(entry[1] for entry in entries)
+        p99 = totals[min(len(totals) - 1, int(0.99 * len(totals)))]
+        print(f"{name:<32}{len(entries):>7}{statistics.median(totals):>10.1f}{p99:>10.1f}"
+              f"{statistics.mean(e[2] for e in entries):>9.1f}{statistics.mean(e[3] for e in entries):>9.1f}"
+              f"{statistics.mean(e[4] for e in entries):>9.1f}")
+
+    if route is not None and rows:
+        print(f"\nSlowest {slowest} traces for {route}:")
+        for _, total, db_ms, http_ms, self_ms, span in sorted(rows[route], key=lambda e: -e[1])[:slowest]:
+            print(f"  {span['trace_id']}  total {total:.1f}ms  db {db_ms:.1f}ms  "
+                  f"http {http_ms:.1f}ms  app {self_ms:.1f}ms  status {span['attributes'].get('http.status_code')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="run the collector stand-in")
+    serve_parser.add_argument('--port', type=int, default=4318)
+    serve_parser.add_argument('--output', default='traces.jsonl')
+    summary_parser = commands.add_parser('summary', help="summarize a span file")
+    summary_parser.add_argument('path')
+    summary_parser.add_argument('--route', help="only this route, e.g. /api/faults/slowcall")
+    summary_parser.add_argument('--slowest', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.port, args.output)
+    else:
+        summary(args.path, args.route, args.slowest)
+
+
+if __name__ == '__main__':
+    main()
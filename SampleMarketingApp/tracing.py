@@ -0,0 +1,312 @@
+"""
+Lightweight distributed tracing for SampleMarketingApp
+
+Enabled with TRACING=1. Sampled requests get a server span, with child
+spans for every SQLAlchemy query and every outbound call made through
+`requests`. Outbound calls carry a W3C traceparent header, so WebApiApp
+(ASP.NET Core reads it into Activity.Current) joins the same trace.
+Incoming traceparent headers are honoured: a sampled parent is always
+traced, others are sampled at TRACE_SAMPLE_RATE (default 1.0).
+
+Finished spans go through a bounded queue to a background exporter, which
+appends them as JSON lines to TRACE_EXPORT (default traces.jsonl) or POSTs
+batches to it when it is an http(s) URL, such as trace_collector.py. A
+full queue drops spans rather than blocking the request.
+
+Responses of sampled requests carry an X-Trace-Id header.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from per_process import PerProcess, start_daemon
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'SampleMarketingApp'
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_STOP = object()
+_current_span = contextvars.ContextVar('current_span', default=None)
+_tracer = None
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name', 'kind',
+                 'start', '_start_perf', 'attributes', 'error')
+
+    def __init__(self, tracer, name, kind, trace_id, parent_id=None, attributes=None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.attributes = attributes or {}
+        self.error = None
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def child(self, name, kind, attributes=None):
+        return Span(self.tracer, name, kind, self.trace_id, self.span_id, attributes)
+
+    def record_error(self, exc):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        self.tracer.exporter.export({
+            "service": SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "duration_ms": round((time.perf_counter() - self._start_perf) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        })
+
+
+class BatchExporter:
+    """Writes finished spans from a bounded queue in a background thread
+
+    The queue and thread are created on first use in each process.
+    """
+
+    def __init__(self, target, maxsize=4096, batch_size=256, interval=1.0):
+        self.target = target
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self.queue = None
+        self._thread = PerProcess(self._start_thread)
+        self._http = target.startswith(('http://', 'https://'))
+
+    def _start_thread(self):
+        self.queue = queue.Queue(self.maxsize)
+        return start_daemon(self._run, 'trace-exporter')
+
+    def export(self, span):
+        self._thread()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        # New threads start with no current span, so the exporter's own
+        # HTTP posts are never traced
+        stopping = False
+        while not stopping:
+            # Wait for a first span, then collect more for up to interval seconds
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    span = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if span is _STOP:
+                    stopping = True
+                    break
+                batch.append(span)
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        try:
+            if self._http:
+                import requests
+                requests.post(self.target, json=batch, timeout=5)
+            else:
+                with open(self.target, 'a', encoding='utf-8') as f:
+                    f.write("".join(json.dumps(span, default=str) + "\n" for span in batch))
+            self.exported += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning("Dropped %d spans, export to %s failed: %s", len(batch), self.target, e)
+
+    def flush(self, timeout=5.0):
+        """Write whatever is queued in this process and stop the thread; used at exit"""
+        if not self._thread.started() or not self._thread.value.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.value.join(timeout)
+
+
+class Tracer:
+    """Sampling decisions and span creation for one process"""
+
+    def __init__(self, exporter, sample_rate=1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_request_span(self, name, traceparent=None, attributes=None):
+        """Return a server span for an inbound request, or None if not sampled"""
+        match = TRACEPARENT.match(traceparent or '')
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            sampled = int(flags, 16) & 1 or random.random() < self.sample_rate
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        return Span(self, name, 'server', trace_id, parent_id, attributes)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def _start_request_span():
+    rule = request.url_rule.rule if request.url_rule is not None else request.path
+    span = _tracer.start_request_span(f"{request.method} {rule}", request.headers.get('traceparent'), {
+        "http.method": request.method,
+        "http.route": rule,
+        "http.target": request.full_path.rstrip('?')
+    })
+    if span is not None:
+        g.trace_span = span
+        g.trace_token = _current_span.set(span)
+
+
+def _tag_response(response):
+    span = g.get('trace_span')
+    if span is not None:
+        span.attributes["http.status_code"] = response.status_code
+        response.headers['X-Trace-Id'] = span.trace_id
+    return response
+
+
+def _end_request_span(exc=None):
+    span = g.pop('trace_span', None)
+    if span is None:
+        return
+    if exc is not None:
+        span.record_error(exc)
+    _current_span.reset(g.pop('trace_token'))
+    span.end()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is not None:
+        context._trace_span = parent.child(statement.split(None, 1)[0].upper() if statement else 'SQL', 'client', {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:500]
+        })
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, '_trace_span', None)
+    if span is not None:
+        if cursor.rowcount >= 0:
+            span.attributes["db.rows"] = cursor.rowcount
+        context._trace_span = None
+        span.end()
+
+
+def _handle_db_error(exception_context):
+    context = exception_context.execution_context
+    span = getattr(context, '_trace_span', None)
+    if span is not None:
+        span.record_error(exception_context.original_exception)
+        context._trace_span = None
+        span.end()
+
+
+_original_send = None
+
+
+def _traced_send(self, prepared, **kwargs):
+    parent = _current_span.get()
+    if parent is None:
+        return _original_send(self, prepared, **kwargs)
+    span = parent.child(f"HTTP {prepared.method}", 'client', {
+        "http.method": prepared.method,
+        "http.url": prepared.url
+    })
+    prepared.headers['traceparent'] = span.traceparent
+    try:
+        response = _original_send(self, prepared, **kwargs)
+        span.attributes["http.status_code"] = response.status_code
+        return response
+    except Exception as e:
+        span.record_error(e)
+        raise
+    finally:
+        span.end()
+
+
+def setup_tracing():
+    """Install the process-wide tracer and instrumentation once; return the tracer"""
+    global _tracer, _original_send
+    if _tracer is None:
+        # Imported here so that only apps with tracing on pay for requests
+        import requests
+
+        exporter = BatchExporter(
+            os.getenv('TRACE_EXPORT', 'traces.jsonl'),
+            maxsize=int(os.getenv('TRACE_QUEUE_SIZE', '4096'))
+        )
+        _tracer = Tracer(exporter, float(os.getenv('TRACE_SAMPLE_RATE', '1.0')))
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_db_error)
+        _original_send = requests.Session.send
+        requests.Session.send = _traced_send
+        atexit.register(exporter.flush)
+    return _tracer
+
+
+def tracing_stats():
+    if _tracer is None:
+        return {"enabled": False}
+    exporter = _tracer.exporter
+    return {
+        "enabled": True,
+        "sample_rate": _tracer.sample_rate,
+        "target": exporter.target,
+        "queue_size": exporter.queue.qsize() if exporter.queue is not None else 0,
+        "exported": exporter.exported,
+        "dropped": exporter.dropped,
+        "failed": exporter.failed
+    }
+
+
+def init_tracing(app):
+    """Trace the app's requests when TRACING is set"""
+    if os.getenv('TRACING', '0') in ('', '0'):
+        return
+    setup_tracing()
+    app.before_request(_start_request_span)
+    app.after_request(_tag_response)
+    app.teardown_request(_end_request_span)
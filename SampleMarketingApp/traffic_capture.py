@@ -0,0 +1,101 @@
+"""
+Traffic capture for replay and performance regression testing
+
+With TRAFFIC_CAPTURE=<path> every request is appended to a compact,
+tab-separated log, one line per request:
+
+    epoch_ms  method  path?query  status  duration_ms
+
+epoch_ms is when the request arrived, so replay pacing follows the original
+arrival pattern; lines are written as requests finish, so overlapping
+requests can appear out of timestamp order. The target is recorded as the
+client sent it, still percent-encoded, so a replay requests exactly the
+same URL.
+
+Lines are handed to a background writer through a bounded queue (the same
+drop-on-full handler the app's logging uses), so capturing never blocks a
+request. Workers append to the same file. traffic_replay.py replays a
+capture against a running instance and compares runs in this format.
+"""
+
+import atexit
+import logging
+import os
+import time
+from urllib.parse import quote
+
+from flask import g, request
+
+from logging_config import DroppingQueueHandler
+
+capture_logger = logging.getLogger('traffic_capture')
+
+
+def format_entry(timestamp_ms, method, target, status, duration_ms):
+    return f"{timestamp_ms}\t{method}\t{target}\t{status}\t{duration_ms:.2f}"
+
+
+def read_log(path):
+    """Yield dicts for each entry of a capture or replay log, skipping comments"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            timestamp_ms, method, target, status, duration_ms = line.rstrip('\n').split('\t')
+            yield {
+                "timestamp_ms": int(timestamp_ms),
+                "method": method,
+                "target": target,
+                "status": int(status),
+                "duration_ms": float(duration_ms)
+            }
+
+
+def _start_timer():
+    g.capture_start = (time.time(), time.perf_counter())
+
+
+def _raw_target():
+    """The request target as sent, still percent-encoded, so it is replayable verbatim"""
+    environ = request.environ
+    # gunicorn sets RAW_URI and several other servers REQUEST_URI; both hold path?query
+    target = environ.get('RAW_URI') or environ.get('REQUEST_URI')
+    if not target:
+        # PATH_INFO is the decoded path with its bytes stored as latin-1
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        target = quote(path.encode('latin-1'), safe="/;:@&=+$,!~*'()")
+        query = environ.get('QUERY_STRING')
+        if query:
+            target += '?' + query
+    # Control characters never appear unencoded in a valid request line, but keep the log line intact
+    return target.replace('\t', '%09').replace('\n', '%0A').replace('\r', '%0D')
+
+
+def _capture(response):
+    start = g.pop('capture_start', None)
+    if start is not None:
+        arrived, start = start
+        duration_ms = (time.perf_counter() - start) * 1000
+        capture_logger.info(format_entry(int(arrived * 1000), request.method, _raw_target(),
+                                         response.status_code, duration_ms))
+    return response
+
+
+def init_capture(app):
+    """Record the app's traffic to TRAFFIC_CAPTURE when it is set"""
+    path = os.getenv('TRAFFIC_CAPTURE')
+    if not path:
+        return
+
+    if not capture_logger.handlers:
+        target = logging.FileHandler(path, encoding='utf-8')
+        target.setFormatter(logging.Formatter('%(message)s'))
+        handler = DroppingQueueHandler(target, int(os.getenv('TRAFFIC_CAPTURE_QUEUE', '10000')))
+        capture_logger.addHandler(handler)
+        atexit.register(handler.stop)
+        capture_logger.setLevel(logging.INFO)
+        # Captured lines are data, not application log messages
+        capture_logger.propagate = False
+
+    app.before_request(_start_timer)
+    app.after_request(_capture)
@@ -0,0 +1,165 @@
+"""
+Replay captured traffic against a running instance and compare runs
+
+run      replay a TRAFFIC_CAPTURE log against --target, keeping the original
+         request spacing (--speed 1), compressing it (--speed 4) or sending
+         as fast as --concurrency allows (--speed 0), and write the results
+         in the same log format
+compare  diff the latency distribution and error rate of two logs (a
+         capture or a replay run), overall and per route
+
+Only GET and HEAD requests are replayed unless --all-methods is given;
+bodies are not captured, so other methods are sent without one. Captured
+durations are measured inside the app while replay durations are seen by
+the client, so compare two replay runs when checking for regressions.
+
+Usage:
+    python traffic_replay.py run capture.log --target http://127.0.0.1:8000 --speed 1 --output baseline.log
+    python traffic_replay.py run capture.log --target http://127.0.0.1:8000 --speed 0 --output candidate.log
+    python traffic_replay.py compare baseline.log candidate.log
+"""
+
+import argparse
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from traffic_capture import format_entry, read_log
+
+REPLAYED_METHODS = ('GET', 'HEAD')
+NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def route_of(target):
+    """Group targets by path, with numeric ids folded: /api/items/<id>"""
+    return NUMERIC_SEGMENT.sub('/<id>', target.split('?', 1)[0])
+
+
+def replay(entries, target, speed, concurrency, timeout):
+    local = threading.local()
+    results = []
+    lock = threading.Lock()
+
+    def send(entry):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            status = session.request(entry["method"], target + entry["target"], timeout=timeout,
+                                     allow_redirects=False).status_code
+        except requests.exceptions.RequestException:
+            status = 0
+        line = format_entry(int(started * 1000), entry["method"], entry["target"], status,
+                            (time.perf_counter() - start) * 1000)
+        with lock:
+            results.append(line)
+
+    first = entries[0]["timestamp_ms"]
+    run_start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if speed <= 0:
+            # Max speed: a bounded number in flight, no pacing
+            list(pool.map(send, entries))
+        else:
+            for entry in entries:
+                delay = (entry["timestamp_ms"] - first) / 1000 / speed - (time.monotonic() - run_start)
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(send, entry)
+    return results, time.monotonic() - run_start
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+def summarize(entries):
+    durations = sorted(entry["duration_ms"] for entry in entries)
+    errors = sum(1 for entry in entries if entry["status"] == 0 or entry["status"] >= 500)
+    return {
+        "count": len(entries),
+        "p50": percentile(durations, 50),
+        "p90": percentile(durations, 90),
+        "p99": percentile(durations, 99),
+        "max": durations[-1] if durations else 0.0,
+        "error_rate": errors / len(entries) if entries else 0.0
+    }
+
+
+def compare(baseline_path, candidate_path, min_count):
+    runs = []
+    for path in (baseline_path, candidate_path):
+        by_route = defaultdict(list)
+        entries = list(read_log(path))
+        for entry in entries:
+            by_route[route_of(entry["target"])].append(entry)
+        runs.append((summarize(entries), {route: summarize(group) for route, group in by_route.items()}))
+    (base_all, base_routes), (cand_all, cand_routes) = runs
+
+    def row(name, base, cand):
+        def delta(key):
+            return f"{cand[key] - base[key]:+.1f}"
+        print(f"{name:<34}{base['count']:>7}{cand['count']:>7}"
+              f"{base['p50']:>9.1f}{cand['p50']:>9.1f}{delta('p50'):>9}"
+              f"{base['p99']:>9.1f}{cand['p99']:>9.1f}{delta('p99'):>9}"
+              f"{base['error_rate'] * 100:>9.1f}%{cand['error_rate'] * 100:>9.1f}%")
+
+    print(f"baseline:  {baseline_path}\ncandidate: {candidate_path}\n")
+    print(f"{'latency ms':<12}{'requests':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'errors':>9}")
+    for label, stats in (("baseline", base_all), ("candidate", cand_all)):
+        print(f"{label:<12}{stats['count']:>9}{stats['p50']:>9.1f}{stats['p90']:>9.1f}{stats['p99']:>9.1f}"
+              f"{stats['max']:>9.1f}{stats['error_rate'] * 100:>8.1f}%")
+    print()
+    print(f"{'route':<34}{'n base':>7}{'n cand':>7}{'p50 base':>9}{'p50 cand':>9}{'delta':>9}"
+          f"{'p99 base':>9}{'p99 cand':>9}{'delta':>9}{'err base':>10}{'err cand':>10}")
+    row("(all)", base_all, cand_all)
+    for route in sorted(set(base_routes) & set(cand_routes), key=lambda r: -base_routes[r]["count"]):
+        if base_routes[route]["count"] >= min_count:
+            row(route, base_routes[route], cand_routes[route])
+    only = sorted(set(base_routes) ^ set(cand_routes))
+    if only:
+        print(f"\nRoutes in only one run: {', '.join(only)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="replay a capture against a running instance")
+    run_parser.add_argument('capture')
+    run_parser.add_argument('--target', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--speed', type=float, default=1.0, help="1 = original pace, 4 = 4x faster, 0 = max")
+    run_parser.add_argument('--concurrency', type=int, default=32)
+    run_parser.add_argument('--timeout', type=float, default=30)
+    run_parser.add_argument('--all-methods', action='store_true', help="also replay POST/PUT/DELETE (without bodies)")
+    run_parser.add_argument('--output', required=True)
+    compare_parser = commands.add_parser('compare', help="compare two capture or replay logs")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--min-count', type=int, default=1, help="hide routes with fewer requests")
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        compare(args.baseline, args.candidate, args.min_count)
+        return
+
+    entries = sorted((entry for entry in read_log(args.capture)
+                      if args.all_methods or entry["method"] in REPLAYED_METHODS),
+                     key=lambda entry: entry["timestamp_ms"])
+    if not entries:
+        parser.error(f"no replayable requests in {args.capture}")
+    results, elapsed = replay(entries, args.target.rstrip('/'), args.speed, args.concurrency, args.timeout)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(f"# replay of {args.capture} against {args.target} at speed {args.speed}\n")
+        f.write("".join(line + "\n" for line in sorted(results)))
+    print(f"Replayed {len(results)} requests in {elapsed:.1f} seconds "
+          f"({len(results) / elapsed:.1f} requests/s) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
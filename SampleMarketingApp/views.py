@@ -0,0 +1,229 @@
+"""
+Catalog routes for SampleMarketingApp
+
+Registered directly on the app (not a blueprint) so templates keep using
+url_for('home') and url_for('products').
+"""
+
+from flask import render_template, jsonify, abort, current_app, request, url_for
+import base64
+import json
+import logging
+from decimal import Decimal
+
+from sqlalchemy import func, tuple_
+
+from catalog_version import catalog_version
+from models import db, Item, MAX_ID, is_valid_id
+
+logger = logging.getLogger(__name__)
+
+FEATURED_ITEMS = 6
+
+# sort option -> (column, descending); ties are broken by id in the same direction
+SORTS = {
+    'name': (Item.name, False),
+    'price-low': (Item.price, False),
+    'price-high': (Item.price, True),
+}
+
+
+def featured_items():
+    """Items shown on the landing page"""
+    return Item.query.limit(FEATURED_ITEMS).all()
+
+
+def home():
+    """Marketing landing page"""
+    try:
+        # Featured items come from the exported snapshot when there is a current one
+        exporter = current_app.extensions.get('catalog_export')
+        featured = exporter.featured() if exporter is not None else None
+        if featured is None:
+            featured = featured_items()
+        return render_template('index.html', featured_items=featured)
+    except Exception as e:
+        logger.error("Exception in home(): %s", e)
+        try:
+            from setup_db import setup_database
+            setup_database(current_app._get_current_object())
+        except Exception as setup_error:
+            logger.error("Error calling setup_database(): %s", setup_error)
+        # Return a basic response if database setup fails
+        return render_template('index.html', featured_items=[])
+
+
+def get_items():
+    """API endpoint to get all items, or a batch of items with ?ids=1,2,3"""
+    if 'ids' in request.args:
+        try:
+            ids = [int(i) for i in request.args['ids'].split(',') if i.strip()]
+        except ValueError:
+            ids = None
+        if ids is None or not all(is_valid_id(i) for i in ids):
+            return jsonify({"error": "Invalid ids",
+                            "details": f"ids must be a comma-separated list of integers from 1 to {MAX_ID}"}), 400
+        return batch_lookup(ids)
+
+    items = Item.query.all()
+    return jsonify([item.to_dict() for item in items])
+
+
+def get_items_batch():
+    """API endpoint to get a batch of items from a JSON body: {"ids": [1, 2, 3]}"""
+    data = request.get_json(silent=True)
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(is_valid_id(i) for i in ids):
+        return jsonify({"error": "Invalid ids", "details": f"ids must be a list of integers from 1 to {MAX_ID}"}), 400
+    return batch_lookup(ids)
+
+
+def batch_lookup(ids):
+    """Resolve many item ids with a single IN query, preserving request order"""
+    # Drop duplicates but keep the order the caller asked for
+    ids = list(dict.fromkeys(ids))
+    max_ids = current_app.config['MAX_BATCH_IDS']
+    if len(ids) > max_ids:
+        return jsonify({"error": "Too many ids", "details": f"At most {max_ids} ids can be requested at once"}), 400
+
+    found = {item.id: item for item in Item.query.filter(Item.id.in_(ids)).all()} if ids else {}
+    return jsonify({
+        "items": [found[i].to_dict() for i in ids if i in found],
+        "missing": [i for i in ids if i not in found]
+    })
+
+
+def get_item(item_id):
+    """API endpoint to get a specific item"""
+    if not is_valid_id(item_id):
+        abort(404)
+    item = Item.query.get_or_404(item_id)
+    return jsonify(item.to_dict())
+
+
+def encode_cursor(item, sort):
+    """Opaque keyset cursor pointing just after item in the given sort order"""
+    column = SORTS[sort][0]
+    value = getattr(item, column.key)
+    payload = json.dumps([str(value) if isinstance(value, Decimal) else value, item.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Return (sort value, id) from a cursor, or raise ValueError"""
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not is_valid_id(item_id):
+        raise ValueError("Invalid cursor: bad id")
+    if SORTS[sort][0] is Item.price:
+        try:
+            value = Decimal(value)
+        except (ArithmeticError, TypeError, ValueError):
+            raise ValueError("Invalid cursor: bad price")
+        if not value.is_finite():
+            raise ValueError("Invalid cursor: bad price")
+    elif not isinstance(value, str):
+        raise ValueError("Invalid cursor: bad name")
+    return value, item_id
+
+
+def catalog_page(category=None, sort='name', after=None, size=24):
+    """Return one page of items and the cursor for the next page (or None)
+
+    Keyset pagination: each page seeks past the last (sort value, id) seen,
+    so with the Item indexes every page costs the same however deep it is.
+    """
+    column, descending = SORTS[sort]
+    query = Item.query
+    if category:
+        query = query.filter(Item.category == category)
+    if after is not None:
+        key = tuple_(column, Item.id)
+        query = query.filter(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(column.desc(), Item.id.desc())
+    else:
+        query = query.order_by(column, Item.id)
+
+    items = query.limit(size + 1).all()
+    next_cursor = encode_cursor(items[size - 1], sort) if len(items) > size else None
+    return items[:size], next_cursor
+
+
+def catalog_facets():
+    """Return (categories, count per category, total), cached per catalog version"""
+    version = catalog_version()
+    cached = current_app.extensions.get('catalog_facets')
+    if cached is None or cached[0] != version:
+        counts = dict(db.session.query(Item.category, func.count(Item.id)).group_by(Item.category).all())
+        categories = sorted(name for name in counts if name)
+        cached = (version, (categories, counts, sum(counts.values())))
+        current_app.extensions['catalog_facets'] = cached
+    return cached[1]
+
+
+def _listing_args():
+    """Parse category/sort/after from the query string; abort 400 on a bad cursor"""
+    category = request.args.get('category') or None
+    sort = request.args.get('sort', 'name')
+    if sort not in SORTS:
+        sort = 'name'
+    after = request.args.get('after')
+    try:
+        after = decode_cursor(after, sort) if after else None
+    except ValueError as e:
+        abort(400, description=str(e))
+    return category, sort, after
+
+
+def products():
+    """Products page showing the first page of items, with infinite scroll"""
+    # Check if products feature is enabled
+    if not current_app.config['PRODUCTS_ENABLED']:
+        abort(404)
+
+    category, sort, after = _listing_args()
+    items, next_cursor = catalog_page(category, sort, after, current_app.config['PRODUCTS_PAGE_SIZE'])
+    categories, counts, total = catalog_facets()
+    filters = {key: value for key, value in (('category', category), ('sort', sort)) if value}
+    return render_template(
+        'products.html',
+        items=items,
+        categories=categories,
+        category=category,
+        sort=sort,
+        total=counts.get(category, 0) if category else total,
+        next_url=url_for('products_page', after=next_cursor, **filters) if next_cursor else None,
+        more_url=url_for('products', after=next_cursor, **filters) if next_cursor else None
+    )
+
+
+def products_page():
+    """HTML fragment with the next page of product cards for infinite scroll
+
+    The URL of the page after it travels in the fragment itself rather than
+    a header, so responses served from the shared cache keep it.
+    """
+    if not current_app.config['PRODUCTS_ENABLED']:
+        abort(404)
+
+    category, sort, after = _listing_args()
+    items, next_cursor = catalog_page(category, sort, after, current_app.config['PRODUCTS_PAGE_SIZE'])
+    filters = {key: value for key, value in (('category', category), ('sort', sort)) if value}
+    return render_template(
+        '_product_page.html',
+        items=items,
+        next_url=url_for('products_page', after=next_cursor, **filters) if next_cursor else None
+    )
+
+
+def register_routes(app):
+    """Register the catalog routes on an app"""
+    app.add_url_rule('/', 'home', home)
+    app.add_url_rule('/api/items', 'get_items', get_items)
+    app.add_url_rule('/api/items/batch', 'get_items_batch', get_items_batch, methods=['POST'])
+    app.add_url_rule('/api/items/<int:item_id>', 'get_item', get_item)
+    app.add_url_rule('/products', 'products', products)
+    app.add_url_rule('/products/page', 'products_page', products_page)
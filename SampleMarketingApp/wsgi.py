@@ -0,0 +1,19 @@
+"""
+Production WSGI entry point for SampleMarketingApp
+
+Run with gunicorn, which picks up gunicorn.conf.py from this directory:
+    gunicorn wsgi:application
+"""
+
+import logging
+
+from app import app, create_tables
+
+# With preload_app the tables are created once in the master process;
+# gunicorn.conf.py disposes the inherited engine in each worker after fork.
+try:
+    create_tables()
+except Exception as e:
+    logging.getLogger(__name__).error("Database initialization failed, continuing without it: %s", e)
+
+application = app